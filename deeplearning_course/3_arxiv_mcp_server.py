@@ -1,16 +1,25 @@
 import arxiv
+import asyncio
 import json
 import os
 from typing import List
 from mcp.server.fastmcp import FastMCP
+from shared.arxiv_client import fetch_papers, get_client, paper_record
+from shared.storage import open_store
 
-PAPER_DIR = "papers"
+# Where papers are saved (MCP_PAPER_DIR moves it elsewhere, e.g. a scratch directory for benchmarks)
+PAPER_DIR = os.getenv("MCP_PAPER_DIR", "papers")
+# Topic for papers fetched by ID rather than found by a search
+BACKFILL_TOPIC = "by_id"
+
+# Where papers are saved: JSON files under PAPER_DIR, or SQLite (MCP_STORAGE=sqlite)
+store = open_store(paper_dir=PAPER_DIR)
 
 # Initialize FastMCP server
 mcp = FastMCP("research")
 
 @mcp.tool()
-def search_papers(topic: str, max_results: int = 5) -> List[str]:
+async def search_papers(topic: str, max_results: int = 5) -> List[str]:
     """
     Search for papers on arXiv based on a topic and store their information.
     
@@ -21,9 +30,14 @@ def search_papers(topic: str, max_results: int = 5) -> List[str]:
     Returns:
         List of paper IDs found in the search
     """
-    
-    # Use arxiv to find the papers 
-    client = arxiv.Client()
+    # The search may wait seconds for its turn at arXiv's rate limit; wait in a
+    # worker thread so the server keeps answering other requests meanwhile
+    return await asyncio.to_thread(run_search, topic, max_results)
+
+def run_search(topic: str, max_results: int) -> List[str]:
+    """Search arXiv and save the results under the topic. Blocks while the rate limiter queues the request."""
+    # Use the process-wide arXiv client, which paces requests to stay under arXiv's rate limit
+    client = get_client()
 
     # Search for the most relevant articles matching the queried topic
     search = arxiv.Search(
@@ -34,45 +48,40 @@ def search_papers(topic: str, max_results: int = 5) -> List[str]:
 
     papers = client.results(search)
     
-    # Create directory for this topic
-    path = os.path.join(PAPER_DIR, topic.lower().replace(" ", "_"))
-    os.makedirs(path, exist_ok=True)
-    
-    file_path = os.path.join(path, "papers_info.json")
-
-    # Try to load existing papers info
-    try:
-        with open(file_path, "r") as json_file:
-            papers_info = json.load(json_file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        papers_info = {}
-
     # Process each paper and add to papers_info  
+    papers_info = {}
     paper_ids = []
     for paper in papers:
         paper_ids.append(paper.get_short_id())
-        paper_info = {
-            'title': paper.title,
-            'authors': [author.name for author in paper.authors],
-            'summary': paper.summary,
-            'pdf_url': paper.pdf_url,
-            'published': str(paper.published.date())
-        }
-        papers_info[paper.get_short_id()] = paper_info
+        papers_info[paper.get_short_id()] = paper_record(paper)
     
-    # Save updated papers_info to json file
-    with open(file_path, "w") as json_file:
-        json.dump(papers_info, json_file, indent=2)
+    # Save the papers under this topic, keeping the ones saved before
+    topic_dir = topic.lower().replace(" ", "_")
+    location = store.save_papers(topic_dir, papers_info)
     
-    print(f"Results are saved in: {file_path}")
+    print(f"Results are saved in: {location}")
     
     return paper_ids
 
+def backfill_papers(paper_ids: List[str]) -> dict:
+    """
+    Fetch papers that aren't saved yet from arXiv in a single request and save them.
+    
+    Returns:
+        Dict mapping each ID arXiv knows to its paper information
+    """
+    papers_info = fetch_papers(paper_ids)
+    if papers_info:
+        store.save_papers(BACKFILL_TOPIC, papers_info)
+    return papers_info
+
 @mcp.tool()
-def extract_info(paper_id: str) -> str:
+async def extract_info(paper_id: str) -> str:
     """
     Search for information about a specific paper across all topic directories.
     
+    A paper that isn't saved yet is fetched from arXiv by its ID and saved.
+    
     Args:
         paper_id: The ID of the paper to look for
         
@@ -80,22 +89,78 @@ def extract_info(paper_id: str) -> str:
         JSON string with paper information if found, error message if not found
     """
  
-    for item in os.listdir(PAPER_DIR):
-        item_path = os.path.join(PAPER_DIR, item)
-        if os.path.isdir(item_path):
-            file_path = os.path.join(item_path, "papers_info.json")
-            if os.path.isfile(file_path):
-                try:
-                    with open(file_path, "r") as json_file:
-                        papers_info = json.load(json_file)
-                        if paper_id in papers_info:
-                            return json.dumps(papers_info[paper_id], indent=2)
-                except (FileNotFoundError, json.JSONDecodeError) as e:
-                    print(f"Error reading {file_path}: {str(e)}")
-                    continue
+    # Indexed lookup in the store instead of scanning every topic
+    paper_info = store.get_paper(paper_id)
+    if paper_info is not None:
+        return json.dumps(paper_info, indent=2)
+    
+    try:
+        # Queued behind arXiv's rate limit in a worker thread, like search_papers
+        paper_info = (await asyncio.to_thread(backfill_papers, [paper_id])).get(paper_id)
+    except Exception as e:
+        return f"There's no saved information related to paper {paper_id}, and fetching it from arXiv failed: {str(e)}"
+    if paper_info is not None:
+        return json.dumps(paper_info, indent=2)
     
     return f"There's no saved information related to paper {paper_id}."
 
+@mcp.tool()
+async def extract_info_batch(paper_ids: List[str]) -> str:
+    """
+    Look up several papers at once, across all topic directories.
+    
+    Papers that aren't saved yet are fetched from arXiv, all in one request,
+    and saved.
+    
+    Args:
+        paper_ids: The IDs of the papers to look for
+        
+    Returns:
+        JSON string with "found" (paper ID -> paper information) and
+        "missing" (IDs arXiv doesn't know either)
+    """
+    # Normalized once, so the lookup, the arXiv fetch and the missing list all use the same IDs
+    paper_ids = list(dict.fromkeys(paper_id.strip() for paper_id in paper_ids if paper_id.strip()))
+    # One pass over the store for every ID, instead of one tool call per paper
+    found = store.get_papers(paper_ids)
+    missing = [paper_id for paper_id in paper_ids if paper_id not in found]
+    
+    result = {"found": found, "missing": missing}
+    if missing:
+        try:
+            found.update(await asyncio.to_thread(backfill_papers, missing))
+        except Exception as e:
+            result["error"] = f"Fetching missing papers from arXiv failed: {str(e)}"
+        result["missing"] = [paper_id for paper_id in paper_ids if paper_id not in found]
+    return json.dumps(result, indent=2)
+
+@mcp.tool()
+def search_local(query: str, max_results: int = 5) -> str:
+    """
+    Search the papers already saved by search_papers, without calling arXiv.
+    
+    Args:
+        query: Words to look for in paper titles and summaries
+        max_results: Maximum number of results to return (default: 5)
+        
+    Returns:
+        JSON string with the best matching papers, best first
+    """
+    results = store.search("papers", query, max_results)
+    if not results:
+        return f"No saved papers match '{query}'. Use search_papers to fetch some from arXiv."
+    return json.dumps(results, indent=2)
+
+@mcp.resource("stats://arxiv")
+def get_arxiv_stats() -> str:
+    """
+    The arXiv client's rate limiter, as JSON.
+    
+    Shows how many requests are queued for their turn right now, the current and
+    maximum request rate, and how many requests were sent and throttled so far.
+    """
+    return json.dumps(get_client().stats(), indent=2)
+
 if __name__ == "__main__":
     # Initialize and run the server
     mcp.run(transport='stdio')
\ No newline at end of file
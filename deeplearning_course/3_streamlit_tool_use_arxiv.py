@@ -5,10 +5,19 @@ import arxiv
 from typing import List
 from dotenv import load_dotenv
 import anthropic
+from concurrent.futures import ThreadPoolExecutor
+from shared.arxiv_client import fetch_papers, get_client, paper_record
+from shared.storage import open_store
+from shared.streaming import stream_message
 
 
 # constants
 PAPER_DIR = "papers"
+# Topic for papers fetched by ID rather than found by a search
+BACKFILL_TOPIC = "by_id"
+
+# Where papers are saved: JSON files under PAPER_DIR, or SQLite (MCP_STORAGE=sqlite)
+store = open_store(paper_dir=PAPER_DIR)
 
 # Tool Functions
 def search_papers(topic: str, max_results: int = 5) -> List[str]:
@@ -23,8 +32,8 @@ def search_papers(topic: str, max_results: int = 5) -> List[str]:
         List of paper IDs found in the search
     """
     
-    # Use arxiv to find the papers 
-    client = arxiv.Client()
+    # Use the process-wide arXiv client, which paces requests to stay under arXiv's rate limit
+    client = get_client()
 
     # Search for the most relevant articles matching the queried topic
     search = arxiv.Search(
@@ -35,44 +44,39 @@ def search_papers(topic: str, max_results: int = 5) -> List[str]:
 
     papers = client.results(search)
     
-    # Create directory for this topic
-    path = os.path.join(PAPER_DIR, topic.lower().replace(" ", "_"))
-    os.makedirs(path, exist_ok=True)
-    
-    file_path = os.path.join(path, "papers_info.json")
-
-    # Try to load existing papers info
-    try:
-        with open(file_path, "r") as json_file:
-            papers_info = json.load(json_file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        papers_info = {}
-
     # Process each paper and add to papers_info  
+    papers_info = {}
     paper_ids = []
     for paper in papers:
         paper_ids.append(paper.get_short_id())
-        paper_info = {
-            'title': paper.title,
-            'authors': [author.name for author in paper.authors],
-            'summary': paper.summary,
-            'pdf_url': paper.pdf_url,
-            'published': str(paper.published.date())
-        }
-        papers_info[paper.get_short_id()] = paper_info
+        papers_info[paper.get_short_id()] = paper_record(paper)
     
-    # Save updated papers_info to json file
-    with open(file_path, "w") as json_file:
-        json.dump(papers_info, json_file, indent=2)
+    # Save the papers under this topic, keeping the ones saved before
+    topic_dir = topic.lower().replace(" ", "_")
+    location = store.save_papers(topic_dir, papers_info)
     
-    print(f"Results are saved in: {file_path}")
+    print(f"Results are saved in: {location}")
     
     return paper_ids
 
+def backfill_papers(paper_ids: List[str]) -> dict:
+    """
+    Fetch papers that aren't saved yet from arXiv in a single request and save them.
+    
+    Returns:
+        Dict mapping each ID arXiv knows to its paper information
+    """
+    papers_info = fetch_papers(paper_ids)
+    if papers_info:
+        store.save_papers(BACKFILL_TOPIC, papers_info)
+    return papers_info
+
 def extract_info(paper_id: str) -> str:
     """
     Search for information about a specific paper across all topic directories.
     
+    A paper that isn't saved yet is fetched from arXiv by its ID and saved.
+    
     Args:
         paper_id: The ID of the paper to look for
         
@@ -80,22 +84,48 @@ def extract_info(paper_id: str) -> str:
         JSON string with paper information if found, error message if not found
     """
  
-    for item in os.listdir(PAPER_DIR):
-        item_path = os.path.join(PAPER_DIR, item)
-        if os.path.isdir(item_path):
-            file_path = os.path.join(item_path, "papers_info.json")
-            if os.path.isfile(file_path):
-                try:
-                    with open(file_path, "r") as json_file:
-                        papers_info = json.load(json_file)
-                        if paper_id in papers_info:
-                            return json.dumps(papers_info[paper_id], indent=2)
-                except (FileNotFoundError, json.JSONDecodeError) as e:
-                    print(f"Error reading {file_path}: {str(e)}")
-                    continue
+    # O(1) lookup in the paper ID index instead of scanning every topic file
+    paper_info = store.get_paper(paper_id)
+    if paper_info is not None:
+        return json.dumps(paper_info, indent=2)
+    
+    try:
+        paper_info = backfill_papers([paper_id]).get(paper_id)
+    except Exception as e:
+        return f"There's no saved information related to paper {paper_id}, and fetching it from arXiv failed: {str(e)}"
+    if paper_info is not None:
+        return json.dumps(paper_info, indent=2)
     
     return f"There's no saved information related to paper {paper_id}."
 
+def extract_info_batch(paper_ids: List[str]) -> str:
+    """
+    Look up several papers at once, across all topic directories.
+    
+    Papers that aren't saved yet are fetched from arXiv, all in one request,
+    and saved.
+    
+    Args:
+        paper_ids: The IDs of the papers to look for
+        
+    Returns:
+        JSON string with "found" (paper ID -> paper information) and
+        "missing" (IDs arXiv doesn't know either)
+    """
+    # One pass over the store for every ID, instead of one tool call per paper
+    paper_ids = list(dict.fromkeys(paper_ids))
+    found = store.get_papers(paper_ids)
+    missing = [paper_id for paper_id in paper_ids if paper_id not in found]
+    
+    result = {"found": found, "missing": missing}
+    if missing:
+        try:
+            found.update(backfill_papers(missing))
+        except Exception as e:
+            result["error"] = f"Fetching missing papers from arXiv failed: {str(e)}"
+        result["missing"] = [paper_id for paper_id in paper_ids if paper_id not in found]
+    return json.dumps(result, indent=2)
+
 # Tool Schema
 # """ 
 # - name: str
@@ -135,6 +165,21 @@ tools = [
             },
             "required": ["paper_id"]
         }
+    },
+    {
+        "name": "extract_info_batch",
+        "description": "Look up several papers at once, across all topic directories. Returns the found papers and the missing IDs.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "paper_ids": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "The IDs of the papers to look for"
+                }
+            },
+            "required": ["paper_ids"]
+        }
     }
 ]
 
@@ -142,7 +187,8 @@ tools = [
 
 mapping_tool_function = {
     "search_papers": search_papers,
-    "extract_info": extract_info
+    "extract_info": extract_info,
+    "extract_info_batch": extract_info_batch
 }
 
 def execute_tool(tool_name, tool_args):
@@ -219,6 +265,47 @@ def process_query(query):
                     st.write(response.content[0].text)
                     process_query = False
 
+# Define the streaming chat function
+def process_query_streaming(query):
+    messages = [{'role': 'user', 'content': query}]
+
+    with ThreadPoolExecutor() as tool_executor:
+        while True:
+            placeholder = st.empty()
+            text = ""
+            pending_tools = []
+
+            def on_text(delta):
+                nonlocal text
+                text += delta
+                placeholder.write(text)
+
+            def on_tool_use(tool_use):
+                # Start the tool while the rest of the response is still streaming
+                st.warning(f"Calling tool {tool_use.name} with args {tool_use.input}", icon="🛠️")
+                pending_tools.append((tool_use, tool_executor.submit(execute_tool, tool_use.name, tool_use.input)))
+
+            response = stream_message(client, on_text, on_tool_use,
+                                      max_tokens=2024,
+                                      model='claude-3-7-sonnet-20250219',
+                                      tools=tools,
+                                      messages=messages)
+
+            if not pending_tools:
+                break
+
+            messages.append({'role': 'assistant', 'content': response.content})
+            messages.append({"role": "user",
+                             "content": [
+                                 {
+                                     "type": "tool_result",
+                                     "tool_use_id": tool_use.id,
+                                     "content": future.result()
+                                 }
+                                 for tool_use, future in pending_tools
+                             ]
+                             })
+
 # Streamlit app
 st.title("Chatbot with Streamlit")
 
@@ -226,8 +313,13 @@ st.write("Type your queries below:")
 
 query = st.text_input("Query")
 
+stream = st.checkbox("Stream responses", value=True)
+
 if st.button("Submit"):
     if query:
-        process_query(query)
+        if stream:
+            process_query_streaming(query)
+        else:
+            process_query(query)
     else:
         st.write("Please enter a query.")
@@ -5,10 +5,22 @@ import wikipedia
 from typing import List
 from dotenv import load_dotenv
 import anthropic
+from concurrent.futures import ThreadPoolExecutor
+from shared.pagination import DEFAULT_PAGE_CHARS, paginate
+from shared.storage import open_store
+from shared.streaming import stream_message
+from shared.wiki_cache import ContentCache
+from shared.wiki_pages import PageTimeout, fetch_pages
 
 # constants
 WIKI_DIR = "wiki_articles"
 
+# Cache of fetched pages shared by all tools, kept in memory and under WIKI_DIR
+content_cache = ContentCache(os.path.join(WIKI_DIR, ".cache"))
+
+# Where articles are saved: JSON files under WIKI_DIR, or SQLite (MCP_STORAGE=sqlite)
+store = open_store(wiki_dir=WIKI_DIR)
+
 # Tool Functions
 def search_articles(topic: str, max_results: int = 5) -> List[str]:
     """
@@ -25,42 +37,25 @@ def search_articles(topic: str, max_results: int = 5) -> List[str]:
     # Use Wikipedia to find articles
     search_results = wikipedia.search(topic, results=max_results)
     
-    # Create directory for this topic
-    path = os.path.join(WIKI_DIR, topic.lower().replace(" ", "_"))
-    os.makedirs(path, exist_ok=True)
-    
-    file_path = os.path.join(path, "articles_info.json")
-
-    # Try to load existing articles info
-    try:
-        with open(file_path, "r") as json_file:
-            articles_info = json.load(json_file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        articles_info = {}
-
     # Process each article and add to articles_info  
+    articles_info = {}
     article_titles = []
-    for title in search_results:
-        try:
-            # Get the Wikipedia page
-            page = wikipedia.page(title)
-            
-            article_titles.append(title)
-            article_info = {
-                'title': page.title,
-                'summary': page.summary,
-                'url': page.url,
-                'content_length': len(page.content)
-            }
-            articles_info[title] = article_info
-            
-        except (wikipedia.exceptions.DisambiguationError, wikipedia.exceptions.PageError) as e:
+    
+    # Fetch all pages concurrently; slow pages are skipped, not waited for
+    pages = fetch_pages(search_results, fetch=content_cache.fetch)
+    
+    for title, page in pages.items():
+        if isinstance(page, PageTimeout):
+            print(f"Skipping article '{title}': {str(page)}")
+            continue
+        
+        if isinstance(page, (wikipedia.exceptions.DisambiguationError, wikipedia.exceptions.PageError)):
             # Handle disambiguation or page not found errors
-            if isinstance(e, wikipedia.exceptions.DisambiguationError):
+            if isinstance(page, wikipedia.exceptions.DisambiguationError):
                 article_info = {
                     'title': title,
                     'error': 'disambiguation',
-                    'options': e.options[:5]  # Store first 5 options
+                    'options': page.options[:5]  # Store first 5 options
                 }
             else:
                 article_info = {
@@ -68,12 +63,25 @@ def search_articles(topic: str, max_results: int = 5) -> List[str]:
                     'error': 'page_not_found'
                 }
             articles_info[title] = article_info
+            continue
+        
+        if isinstance(page, Exception):
+            raise page
+        
+        article_titles.append(title)
+        article_info = {
+            'title': page.title,
+            'summary': page.summary,
+            'url': page.url,
+            'content_length': len(page.content)
+        }
+        articles_info[title] = article_info
     
-    # Save updated articles_info to json file
-    with open(file_path, "w") as json_file:
-        json.dump(articles_info, json_file, indent=2)
+    # Save the articles under this topic, keeping the ones saved before
+    topic_dir = topic.lower().replace(" ", "_")
+    location = store.save_articles(topic_dir, articles_info)
     
-    print(f"Results are saved in: {file_path}")
+    print(f"Results are saved in: {location}")
     
     return article_titles
 
@@ -88,35 +96,32 @@ def extract_info(article_title: str) -> str:
         JSON string with article information if found, error message if not found
     """
  
-    for item in os.listdir(WIKI_DIR):
-        item_path = os.path.join(WIKI_DIR, item)
-        if os.path.isdir(item_path):
-            file_path = os.path.join(item_path, "articles_info.json")
-            if os.path.isfile(file_path):
-                try:
-                    with open(file_path, "r") as json_file:
-                        articles_info = json.load(json_file)
-                        if article_title in articles_info:
-                            return json.dumps(articles_info[article_title], indent=2)
-                except (FileNotFoundError, json.JSONDecodeError) as e:
-                    print(f"Error reading {file_path}: {str(e)}")
-                    continue
+    for topic in store.list_article_topics():
+        articles_info = store.get_articles(topic) or {}
+        if article_title in articles_info:
+            return json.dumps(articles_info[article_title], indent=2)
     
     return f"There's no saved information related to article '{article_title}'."
 
-def get_article_content(article_title: str) -> str:
+def get_article_content(article_title: str, offset: int = 0, max_chars: int = DEFAULT_PAGE_CHARS) -> str:
     """
-    Get the full content of a Wikipedia article.
+    Get the content of a Wikipedia article, one page of text at a time.
+    
+    The full article is fetched once and cached, so reading further pages
+    doesn't go back to Wikipedia.
     
     Args:
         article_title: The title of the article to retrieve
+        offset: Character to start from; pass the next_cursor of the previous call to continue (default: 0)
+        max_chars: Maximum number of characters to return (default: 2000)
         
     Returns:
-        String with article content if found, error message if not found
+        JSON string with title, offset, content, total_chars and next_cursor
+        (null at the end of the article), error message if not found
     """
     try:
-        page = wikipedia.page(article_title)
-        return page.content[:2000] + "..." if len(page.content) > 2000 else page.content
+        page = content_cache.fetch(article_title)
+        return json.dumps({"title": page.title, **paginate(page.content, offset, max_chars)}, indent=2, ensure_ascii=False)
     except wikipedia.exceptions.DisambiguationError as e:
         return f"Disambiguation error: '{article_title}' may refer to multiple articles. Options: {', '.join(e.options[:5])}"
     except wikipedia.exceptions.PageError:
@@ -161,13 +166,23 @@ tools = [
     },
     {
         "name": "get_article_content",
-        "description": "Get the full content of a Wikipedia article.",
+        "description": "Get the content of a Wikipedia article, one page of text at a time. Pass the returned next_cursor as offset to read on.",
         "input_schema": {
             "type": "object",
             "properties": {
                 "article_title": {
                     "type": "string",
                     "description": "The title of the article to retrieve"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Character to start from; the next_cursor of the previous call",
+                    "default": 0
+                },
+                "max_chars": {
+                    "type": "integer",
+                    "description": "Maximum number of characters to return",
+                    "default": 2000
                 }
             },
             "required": ["article_title"]
@@ -300,6 +315,80 @@ def process_query(query):
                     st.session_state.messages.append({'role': 'assistant', 'content': response.content[0].text})
                     process_query = False
 
+def show_tool_call(tool_name, tool_args, result):
+    # Mostrar la llamada a la herramienta en un acordeón
+    with st.expander(f"🛠️ Usando herramienta: {tool_name}", expanded=False):
+        st.json(tool_args)
+        st.markdown("### Resultado:")
+        if tool_name == "get_article_content":
+            st.markdown(result)
+        else:
+            try:
+                # Intentar formatear como JSON si es posible
+                st.json(json.loads(result))
+            except:
+                st.markdown(result)
+
+# Define the streaming chat function
+def process_query_streaming(query):
+    # Inicializar o recuperar el historial de chat
+    if 'messages' not in st.session_state:
+        st.session_state.messages = []
+    
+    # Agregar la consulta del usuario al historial
+    st.session_state.messages.append({'role': 'user', 'content': query})
+    
+    # Mostrar la consulta del usuario en la interfaz
+    with st.chat_message("user"):
+        st.write(query)
+    
+    # Preparar mensajes para la API
+    api_messages = [{'role': m['role'], 'content': m['content']} for m in st.session_state.messages]
+    
+    with ThreadPoolExecutor() as tool_executor:
+        while True:
+            with st.chat_message("assistant"):
+                # Mostrar el texto a medida que llega
+                placeholder = st.empty()
+                text = ""
+                pending_tools = []
+                
+                def on_text(delta):
+                    nonlocal text
+                    text += delta
+                    placeholder.write(text)
+                
+                def on_tool_use(tool_use):
+                    # Ejecutar la herramienta mientras el resto de la respuesta sigue llegando
+                    pending_tools.append((tool_use, tool_executor.submit(execute_tool, tool_use.name, tool_use.input)))
+                
+                response = stream_message(
+                    client, on_text, on_tool_use,
+                    max_tokens=2024,
+                    model='claude-3-7-sonnet-20250219',
+                    tools=tools,
+                    messages=api_messages
+                )
+                
+                tool_results = []
+                for tool_use, future in pending_tools:
+                    result = future.result()
+                    show_tool_call(tool_use.name, tool_use.input, result)
+                    tool_results.append({
+                        "type": "tool_result",
+                        "tool_use_id": tool_use.id,
+                        "content": result
+                    })
+            
+            if not tool_results:
+                # Guardar la respuesta en el historial
+                st.session_state.messages.append({'role': 'assistant', 'content': text})
+                break
+            
+            # Actualizar los mensajes para la API
+            api_messages.append({'role': 'assistant', 'content': response.content})
+            api_messages.append({"role": "user", "content": tool_results})
+
 # Streamlit app
 st.title("Chatbot de Wikipedia con Streamlit")
 
@@ -317,5 +406,11 @@ for message in st.session_state.messages:
 # Campo de entrada para la consulta
 query = st.chat_input("Escribe tu consulta aquí")
 
+# Mostrar las respuestas a medida que se generan
+stream = st.sidebar.checkbox("Stream responses", value=True)
+
 if query:
-    process_query(query)
+    if stream:
+        process_query_streaming(query)
+    else:
+        process_query(query)
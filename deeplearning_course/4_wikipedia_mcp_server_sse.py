@@ -1,12 +1,35 @@
-import wikipedia
+import os
+import json
 from typing import List
 from mcp.server.fastmcp import FastMCP
+from shared.mediawiki import Disambiguation, MediaWikiClient, PageNotFound
+from shared.pagination import DEFAULT_PAGE_CHARS, paginate
+from shared.single_flight import SingleFlight
+from shared.topic_aliases import normalize_topic
+from shared.wiki_cache import ContentCache
+from shared.wiki_pages import afetch_summaries
 
 # Initialize FastMCP server
 mcp = FastMCP("Wikipedia MCP", host="0.0.0.0", port=8000)
 
+# Cache of fetched pages, kept in memory and under the wiki_articles directory
+# (MCP_WIKI_DIR moves it elsewhere, e.g. a scratch directory for benchmarks)
+WIKI_DIR = os.getenv("MCP_WIKI_DIR") or os.path.join(os.path.dirname(__file__), "wiki_articles")
+content_cache = ContentCache(os.path.join(WIKI_DIR, ".cache"))
+
+# Async MediaWiki API client, so a slow Wikipedia request doesn't hold up other calls
+wiki = MediaWikiClient()
+
+# Identical tool calls and page fetches in flight at the same time share one upstream request
+flights = SingleFlight()
+
+def fetch_page(title: str):
+    """Fetch a page through the cache, joining a fetch of the same page already in flight."""
+    return flights.do(("page", title.strip()), lambda: content_cache.afetch(title, wiki.page))
+
 @mcp.tool()
-def search_articles(topic: str, max_results: int = 5) -> List[str]:
+@flights.coalesce(topic=normalize_topic)
+async def search_articles(topic: str, max_results: int = 5) -> List[str]:
     """
     Search for articles on Wikipedia based on a topic and store their information.
     
@@ -19,7 +42,7 @@ def search_articles(topic: str, max_results: int = 5) -> List[str]:
     """
     print("call search_article")
     # Use Wikipedia to find articles
-    search_results = wikipedia.search(topic, results=max_results)
+    search_results = await wiki.search(topic, limit=max_results)
     
     # Process each article and add to articles_info  
     article_titles = []
@@ -29,27 +52,65 @@ def search_articles(topic: str, max_results: int = 5) -> List[str]:
     return article_titles
 
 @mcp.tool()
-def get_article_content(article_title: str) -> str:
+@flights.coalesce()
+async def get_article_content(article_title: str, offset: int = 0, max_chars: int = DEFAULT_PAGE_CHARS) -> str:
     """
-    Get the full content of a Wikipedia article.
+    Get the content of a Wikipedia article, one page of text at a time.
+    
+    The full article is fetched once and cached, so reading further pages
+    doesn't go back to Wikipedia.
     
     Args:
         article_title: The title of the article to retrieve
+        offset: Character to start from; pass the next_cursor of the previous call to continue (default: 0)
+        max_chars: Maximum number of characters to return (default: 2000)
         
     Returns:
-        String with article content if found, error message if not found
+        JSON string with title, offset, content, total_chars and next_cursor
+        (null at the end of the article), error message if not found
     """
     print("call get_article_content")
     try:
-        page = wikipedia.page(article_title)
-        return page.content[:2000] + "..." if len(page.content) > 2000 else page.content
-    except wikipedia.exceptions.DisambiguationError as e:
+        page = await fetch_page(article_title)
+        return json.dumps({"title": page.title, **paginate(page.content, offset, max_chars)}, indent=2, ensure_ascii=False)
+    except Disambiguation as e:
         return f"Disambiguation error: '{article_title}' may refer to multiple articles. Options: {', '.join(e.options[:5])}"
-    except wikipedia.exceptions.PageError:
+    except PageNotFound:
         return f"Page error: No article found with title '{article_title}'"
     except Exception as e:
         return f"Error retrieving article: {str(e)}"
 
+@mcp.tool()
+@flights.coalesce()
+async def get_articles_content(titles: List[str], max_chars: int = DEFAULT_PAGE_CHARS) -> str:
+    """
+    Get the summaries of several Wikipedia articles in one call.
+    
+    Only the summary (the lead section, before the first heading) of each
+    article is returned, not its full text: Wikipedia hands out full text one
+    article per request, summaries up to 20 per request. Use get_article_content
+    to read an article's full text.
+    
+    Args:
+        titles: The titles of the articles to retrieve
+        max_chars: Maximum number of characters to return per summary (default: 2000)
+        
+    Returns:
+        JSON string with "found" (requested title -> title, url and summary)
+        and "missing" (requested title -> why it couldn't be retrieved)
+    """
+    print("call get_articles_content")
+    titles = list(dict.fromkeys(title.strip() for title in titles))
+    pages = await afetch_summaries(titles, wiki.summaries, content_cache)
+    
+    result = {"found": {}, "missing": {}}
+    for title, page in pages.items():
+        if isinstance(page, Exception):
+            result["missing"][title] = str(page)
+            continue
+        result["found"][title] = {"title": page.title, "url": page.url, "summary": page.summary[:max_chars]}
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
 if __name__ == "__main__":
     # Initialize and run the server
     mcp.run(transport="sse")
@@ -1,10 +1,18 @@
 import wikipedia
+import os
+import json
 from typing import List
 from mcp.server.fastmcp import FastMCP
+from shared.pagination import DEFAULT_PAGE_CHARS, paginate
+from shared.wiki_cache import ContentCache
 
 # Initialize FastMCP server
 mcp = FastMCP("Wikipedia MCP")
 
+# Cache of fetched pages, kept in memory and under the wiki_articles directory
+WIKI_DIR = os.path.join(os.path.dirname(__file__), "wiki_articles")
+content_cache = ContentCache(os.path.join(WIKI_DIR, ".cache"))
+
 @mcp.tool()
 def search_articles(topic: str, max_results: int = 5) -> List[str]:
     """
@@ -29,19 +37,25 @@ def search_articles(topic: str, max_results: int = 5) -> List[str]:
     return article_titles
 
 @mcp.tool()
-def get_article_content(article_title: str) -> str:
+def get_article_content(article_title: str, offset: int = 0, max_chars: int = DEFAULT_PAGE_CHARS) -> str:
     """
-    Get the full content of a Wikipedia article.
+    Get the content of a Wikipedia article, one page of text at a time.
+    
+    The full article is fetched once and cached, so reading further pages
+    doesn't go back to Wikipedia.
     
     Args:
         article_title: The title of the article to retrieve
+        offset: Character to start from; pass the next_cursor of the previous call to continue (default: 0)
+        max_chars: Maximum number of characters to return (default: 2000)
         
     Returns:
-        String with article content if found, error message if not found
+        JSON string with title, offset, content, total_chars and next_cursor
+        (null at the end of the article), error message if not found
     """
     try:
-        page = wikipedia.page(article_title)
-        return page.content[:2000] + "..." if len(page.content) > 2000 else page.content
+        page = content_cache.fetch(article_title)
+        return json.dumps({"title": page.title, **paginate(page.content, offset, max_chars)}, indent=2, ensure_ascii=False)
     except wikipedia.exceptions.DisambiguationError as e:
         return f"Disambiguation error: '{article_title}' may refer to multiple articles. Options: {', '.join(e.options[:5])}"
     except wikipedia.exceptions.PageError:
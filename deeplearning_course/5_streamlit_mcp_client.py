@@ -1,47 +1,127 @@
 # File: deeplearning_course/5_streamlit_mcp_client.py
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from dotenv import load_dotenv
-from anthropic import Anthropic
-from mcp import ClientSession
-from mcp.client.sse import sse_client
-from typing import List
+from typing import Dict, List
 import asyncio
 import json
+import threading
 import time
+from shared.background_loop import BackgroundLoop
+from shared.model_client import create_async_client
+from shared.streaming import astream_message
+from shared.sse_session import PersistentSSESession
 
 load_dotenv()
 
 class StreamlitMCPChatBot:
     def __init__(self):
-        self.anthropic = Anthropic()
+        # Async client with a pooled connection, so model calls don't block the
+        # event loop that also runs the MCP sessions
+        self.anthropic = create_async_client()
+        # Event loop thread that keeps the SSE sessions alive across reruns
+        self.loop = BackgroundLoop()
+        # One persistent session per server URL, shared by all tool calls
+        self.sessions: Dict[str, PersistentSSESession] = {}
         
+    def session_for(self, server_url: str) -> PersistentSSESession:
+        """Get the persistent session for a server, creating it on first use"""
+        if server_url not in self.sessions:
+            self.sessions[server_url] = PersistentSSESession(server_url)
+        return self.sessions[server_url]
+
     # Get available tools
     async def get_available_tools(self, server_url: str):
         """Get list of available tools from server"""
-        async with sse_client(server_url) as streams:
-            async with ClientSession(streams[0], streams[1]) as session:
-                await session.initialize()
-                response = await session.list_tools()
-                
-                return [{
-                    "name": tool.name,
-                    "description": tool.description,
-                    "input_schema": tool.inputSchema
-                } for tool in response.tools]
+        response = await self.session_for(server_url).list_tools()
+        
+        return [{
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": tool.inputSchema
+        } for tool in response.tools]
 
     # Execute Tool
     async def execute_tool(self, server_url: str, tool_name: str, tool_args: dict):
-        """Execute a single tool call"""
-        async with sse_client(server_url) as streams:
-            async with ClientSession(streams[0], streams[1]) as session:
-                await session.initialize()
-                return await session.call_tool(tool_name, arguments=tool_args)
+        """Execute a single tool call on the server's persistent session"""
+        return await self.session_for(server_url).call_tool(tool_name, tool_args)
+
+    def run(self, coro):
+        """
+        Run a coroutine on the background loop from the Streamlit script thread.
+
+        The script run context is attached to the loop thread so st.* calls made
+        by the coroutine render into the current page.
+        """
+        ctx = get_script_run_ctx()
+        
+        async def with_script_context():
+            add_script_run_ctx(threading.current_thread(), ctx)
+            return await coro
+        
+        return self.loop.run(with_script_context())
+
+    def disconnect(self):
+        """Close every session and stop the background loop"""
+        async def close():
+            await asyncio.gather(*(session.close() for session in self.sessions.values()))
+            await self.anthropic.close()
+        
+        try:
+            self.loop.run(close())
+        except Exception as e:
+            print(f"Error during disconnection: {e}")
+        finally:
+            self.sessions.clear()
+            self.loop.stop()
+
+    async def run_tool_call(self, server_url: str, content, container) -> dict:
+        """Execute one tool_use block, show it in the UI and return its tool_result block"""
+        # Render into containers created up front, so concurrent calls don't
+        # interleave inside each other's expanders
+        expander = container.expander(f"🛠️ Using tool: {content.name}", expanded=True)
+        expander.markdown(f"**Tool ID:** `{content.id}`")
+        expander.markdown("**Arguments:**")
+        expander.json(content.input)
+        
+        progress_placeholder = expander.empty()
+        progress_placeholder.info(f"🔄 Executing {content.name}...")
+        
+        start_time = time.time()
+        try:
+            result = await self.execute_tool(server_url, content.name, content.input)
+        except Exception as e:
+            elapsed = time.time() - start_time
+            progress_placeholder.error(f"❌ {content.name} failed after {elapsed:.1f}s")
+            expander.error(f"Error: {str(e)}")
+            return {
+                "type": "tool_result",
+                "tool_use_id": content.id,
+                "content": f"Error executing {content.name}: {str(e)}",
+                "is_error": True
+            }
+        elapsed = time.time() - start_time
+        
+        progress_placeholder.success(f"✅ {content.name} completed in {elapsed:.1f}s")
+        
+        expander.markdown("### Result:")
+        try:
+            json_content = json.loads(result.content)
+            expander.json(json_content)
+        except (json.JSONDecodeError, TypeError):
+            expander.markdown(str(result.content))
+        
+        return {
+            "type": "tool_result",
+            "tool_use_id": content.id,
+            "content": result.content
+        }
 
-    async def process_query_with_tools(self, server_url: str, query: str, available_tools: List[dict]):
+    async def process_query_with_tools(self, server_url: str, query: str, available_tools: List[dict], container=st):
         """Process a query using available tools"""
         messages = [{'role': 'user', 'content': query}]
         
-        response = self.anthropic.messages.create(
+        response = await self.anthropic.messages.create(
             max_tokens=2024,
             model='claude-3-7-sonnet-20250219',
             tools=available_tools,
@@ -52,6 +132,7 @@ class StreamlitMCPChatBot:
         
         while True:
             assistant_content = []
+            tool_uses = []
             
             for content in response.content:
                 if content.type == 'text':
@@ -60,51 +141,66 @@ class StreamlitMCPChatBot:
                     
                 elif content.type == 'tool_use':
                     assistant_content.append(content)
-                    
-                    # Show tool usage in UI
-                    with st.expander(f"🛠️ Using tool: {content.name}", expanded=True):
-                        st.markdown(f"**Tool ID:** `{content.id}`")
-                        st.markdown("**Arguments:**")
-                        st.json(content.input)
-                        
-                        progress_placeholder = st.empty()
-                        progress_placeholder.info(f"🔄 Executing {content.name}...")
-                        
-                        start_time = time.time()
-                        result = await self.execute_tool(server_url, content.name, content.input)
-                        elapsed = time.time() - start_time
-                        
-                        progress_placeholder.success(f"✅ {content.name} completed in {elapsed:.1f}s")
-                        
-                        st.markdown("### Result:")
-                        try:
-                            json_content = json.loads(result.content)
-                            st.json(json_content)
-                        except (json.JSONDecodeError, TypeError):
-                            st.markdown(str(result.content))
-                    
-                    # Add messages for tool interaction
-                    messages.append({'role': 'assistant', 'content': assistant_content})
-                    messages.append({
-                        "role": "user",
-                        "content": [{
-                            "type": "tool_result",
-                            "tool_use_id": content.id,
-                            "content": result.content
-                        }]
-                    })
-                    
-                    # Get next response
-                    response = self.anthropic.messages.create(
-                        max_tokens=2024,
-                        model='claude-3-7-sonnet-20250219',
-                        tools=available_tools,
-                        messages=messages
-                    )
-                    break
-            else:
+                    tool_uses.append(content)
+            
+            if not tool_uses:
                 # No tool use found, we're done
                 break
+            
+            # Run every tool requested in this turn at the same time
+            tool_results = await asyncio.gather(*(
+                self.run_tool_call(server_url, content, container) for content in tool_uses
+            ))
+            
+            # Send all tool results back in a single message
+            messages.append({'role': 'assistant', 'content': assistant_content})
+            messages.append({"role": "user", "content": list(tool_results)})
+            
+            # Get next response
+            response = await self.anthropic.messages.create(
+                max_tokens=2024,
+                model='claude-3-7-sonnet-20250219',
+                tools=available_tools,
+                messages=messages
+            )
+        
+        return full_response
+
+    async def process_query_streaming(self, server_url: str, query: str, available_tools: List[dict], container=st):
+        """Process a query, streaming Claude's text into the UI and starting each tool as soon as its block is complete"""
+        messages = [{'role': 'user', 'content': query}]
+        
+        full_response = ""
+        
+        while True:
+            placeholder = container.empty()
+            text = ""
+            tool_tasks = []
+            
+            def on_text(delta):
+                nonlocal text
+                text += delta
+                placeholder.markdown(text)
+            
+            def on_tool_use(content):
+                tool_tasks.append(asyncio.create_task(self.run_tool_call(server_url, content, container)))
+            
+            response = await astream_message(
+                self.anthropic, on_text, on_tool_use,
+                max_tokens=2024,
+                model='claude-3-7-sonnet-20250219',
+                tools=available_tools,
+                messages=messages
+            )
+            full_response += text
+            
+            if not tool_tasks:
+                break
+            
+            # Send all tool results back in a single message
+            tool_results = await asyncio.gather(*tool_tasks)
+            messages.append({'role': 'assistant', 'content': response.content})
+            messages.append({"role": "user", "content": list(tool_results)})
         
         return full_response
 
@@ -131,12 +227,19 @@ def main():
         server_url = st.text_input("MCP server URL", st.session_state.server_url)
         st.session_state.server_url = server_url
         
+        # Show Claude's answer token by token instead of all at once
+        st.session_state.stream = st.checkbox("⚡ Stream responses", value=True)
+        
         if not st.session_state.connected:
             if st.button("🔌 Connect to MCP server"):
                 with st.spinner("Connecting to MCP server..."):
                     try:
                         chatbot = StreamlitMCPChatBot()
-                        tools = asyncio.run(chatbot.get_available_tools(server_url))
+                        try:
+                            tools = chatbot.run(chatbot.get_available_tools(server_url))
+                        except Exception:
+                            chatbot.disconnect()
+                            raise
                         
                         st.session_state.available_tools = tools
                         st.session_state.connected = True
@@ -149,6 +252,8 @@ def main():
             st.success("✅ Connected to MCP server")
             
             if st.button("🔌 Disconnect"):
+                if st.session_state.chatbot:
+                    st.session_state.chatbot.disconnect()
                 st.session_state.available_tools = []
                 st.session_state.connected = False
                 st.session_state.messages = []
@@ -182,16 +287,24 @@ def main():
                 st.markdown(prompt)
             
             # Generate assistant response
-            with st.chat_message("assistant"):
+            # chat_message()'s __enter__ returns None, so bind the container before entering it
+            assistant_message = st.chat_message("assistant")
+            with assistant_message:
                 try:
-                    response = asyncio.run(
-                        st.session_state.chatbot.process_query_with_tools(
+                    # Tool calls reuse the chatbot's persistent SSE session
+                    chatbot = st.session_state.chatbot
+                    process = chatbot.process_query_streaming if st.session_state.stream else chatbot.process_query_with_tools
+                    response = chatbot.run(
+                        process(
                             st.session_state.server_url,
                             prompt,
-                            st.session_state.available_tools
+                            st.session_state.available_tools,
+                            assistant_message
                         )
                     )
-                    st.markdown(response)
+                    if not st.session_state.stream:
+                        # Streamed text is already on screen
+                        st.markdown(response)
                     st.session_state.messages.append({"role": "assistant", "content": response})
                 except Exception as e:
                     error_msg = f"❌ Error processing query: {str(e)}"
@@ -1,8 +1,8 @@
 # File: deeplearning_course/6_streamlit_mcp_client_multiple.py
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from dotenv import load_dotenv
-from anthropic import Anthropic
-from mcp import ClientSession
+from mcp import ClientSession, types
 from mcp.client.stdio import stdio_client, StdioServerParameters
 from typing import List, Dict
 import asyncio
@@ -10,18 +10,37 @@ import json
 import time
 from contextlib import AsyncExitStack
 import traceback
+import threading
 import os
+from shared.background_loop import BackgroundLoop
+from shared.model_client import create_async_client
+from shared.streaming import astream_message
+from shared.tool_schema_cache import ToolSchemaCache
 
 load_dotenv()
 
+# Seconds a server may take to start and finish its handshake, unless its
+# entry in server_config.json sets "handshakeTimeout"
+DEFAULT_HANDSHAKE_TIMEOUT = 30
+
+# Tool schemas from earlier runs, keyed by each server's command, args and env
+TOOL_SCHEMA_CACHE_FILE = ".tool_schema_cache.json"
+
 class StreamlitMCPChatBot:
     """
     ChatBot that connects to multiple MCP servers and allows using their tools
     through Claude AI in a Streamlit interface.
+
+    The sessions live on a background event loop owned by the chatbot, so they
+    stay connected across Streamlit reruns and every prompt reuses them.
+    Servers whose tools are in the schema cache keep starting in the background
+    while their cached tools are already offered to Claude.
     """
     
     def __init__(self):
-        self.anthropic = Anthropic()
+        # Async client with a pooled connection, so model calls don't block the
+        # event loop that also runs the MCP sessions
+        self.anthropic = create_async_client()
         # Stores active sessions with each MCP server
         self.sessions: List[ClientSession] = []
         # Maps each tool to its corresponding session
@@ -30,71 +49,224 @@ class StreamlitMCPChatBot:
         self.available_tools: List[dict] = []
         # Maps tools to their origin servers
         self.tool_server_map: Dict[str, str] = {}
-        self.exit_stack = None
+        # Servers that are connected, and servers that failed with the reason
+        self.connected_servers: List[str] = []
+        self.degraded_servers: Dict[str, str] = {}
+        # Servers still starting in the background, and the futures they resolve when ready
+        self.starting_servers: List[str] = []
+        self._server_ready: Dict[str, asyncio.Future] = {}
+        # Tool schemas saved by earlier connections
+        self.schema_cache = ToolSchemaCache(TOOL_SCHEMA_CACHE_FILE)
+        # Event loop thread that keeps the sessions alive across reruns
+        self.loop = BackgroundLoop()
+        # Set by disconnect_all to close the sessions
+        self._shutdown: asyncio.Event = None
+        # One task per server, each owning that server's exit stack
+        self._server_tasks: Dict[str, asyncio.Task] = {}
+        
+    def _register_tools(self, server_name: str, tools: List[dict], session: ClientSession = None) -> None:
+        """Replaces the tools registered for a server, in place so UI references stay valid."""
+        self._unregister_tools(server_name)
+        for tool in tools:
+            self.tool_server_map[tool["name"]] = server_name
+            if session is not None:
+                self.tool_to_session[tool["name"]] = session
+            self.available_tools.append(tool)
+
+    def _unregister_tools(self, server_name: str) -> None:
+        """Removes every tool of a server."""
+        names = {name for name, server in self.tool_server_map.items() if server == server_name}
+        self.available_tools[:] = [tool for tool in self.available_tools if tool["name"] not in names]
+        for name in names:
+            del self.tool_server_map[name]
+            self.tool_to_session.pop(name, None)
+
+    async def _list_tools(self, server_name: str, server_config: dict, session: ClientSession) -> None:
+        """Gets the tools of a server, registers them and saves them in the schema cache."""
+        response = await session.list_tools()
+        tools = [{
+            "name": tool.name,
+            "description": tool.description,
+            "input_schema": tool.inputSchema
+        } for tool in response.tools]
+        print(f"Connected to {server_name} with tools:", [t["name"] for t in tools])
+        
+        self.schema_cache.put(server_config, tools)
+        self._register_tools(server_name, tools, session)
+
+    def _message_handler(self, server_name: str, server_config: dict):
+        """Builds a handler that refreshes a server's tools when it reports they changed."""
+        async def handle(message):
+            if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+                self.schema_cache.invalidate(server_config)
+                session = next(
+                    (self.tool_to_session[name] for name, server in self.tool_server_map.items()
+                     if server == server_name and name in self.tool_to_session),
+                    None
+                )
+                if session is not None:
+                    # list_tools can't be awaited here: this runs in the session's receive loop
+                    asyncio.create_task(self._list_tools(server_name, server_config, session))
         
-    async def connect_to_server(self, server_name: str, server_config: dict) -> None:
+        return handle
+
+    async def connect_to_server(self, server_name: str, server_config: dict, exit_stack: AsyncExitStack) -> None:
         """Connects to an individual MCP server."""
         try:
             # Configure stdio connection with the server
             server_params = StdioServerParameters(**server_config)
-            stdio_transport = await self.exit_stack.enter_async_context(
+            stdio_transport = await exit_stack.enter_async_context(
                 stdio_client(server_params)
             )
             read, write = stdio_transport
             
             # Establish session with the server
-            session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write)
+            session = await exit_stack.enter_async_context(
+                ClientSession(read, write, message_handler=self._message_handler(server_name, server_config))
             )
             await session.initialize()
-            self.sessions.append(session)
-            
-            # Get available tools from the server
-            response = await session.list_tools()
-            tools = response.tools
-            print(f"Connected to {server_name} with tools:", [t.name for t in tools])
             
-            # Register each tool and its server
-            for tool in tools:
-                self.tool_to_session[tool.name] = session
-                self.tool_server_map[tool.name] = server_name
-                self.available_tools.append({
-                    "name": tool.name,
-                    "description": tool.description,
-                    "input_schema": tool.inputSchema
-                })
+            # Get available tools from the server and register them
+            await self._list_tools(server_name, server_config, session)
+            self.sessions.append(session)
+            self.connected_servers.append(server_name)
                 
         except Exception as e:
             print(f"Error connecting to {server_name}: {e}")
             raise
 
+    async def _hold_server(self, server_name: str, server_config: dict, ready: asyncio.Future):
+        """
+        Connects to one server and keeps its session open until disconnect_all.
+
+        The server's exit stack is entered and closed in this single task, as
+        required by the anyio task groups inside stdio_client and ClientSession.
+        """
+        try:
+            async with AsyncExitStack() as exit_stack:
+                await self.connect_to_server(server_name, server_config, exit_stack)
+                ready.set_result(None)
+                await self._shutdown.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"Error closing {server_name}: {e}")
+
+    async def _wait_for_handshake(self, server_name: str, ready: asyncio.Future, task: asyncio.Task, timeout: float) -> None:
+        """Waits for a server's handshake, marking it degraded if it fails or times out."""
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), timeout)
+        except asyncio.TimeoutError:
+            task.cancel()
+            ready.set_exception(TimeoutError(f"{server_name} did not start"))
+            self.degraded_servers[server_name] = f"No handshake after {timeout}s"
+            print(f"Timed out connecting to {server_name} after {timeout}s")
+        except Exception as e:
+            self.degraded_servers[server_name] = str(e)
+        finally:
+            if server_name in self.starting_servers:
+                self.starting_servers.remove(server_name)
+            if server_name in self.degraded_servers:
+                # Drop tools offered from the schema cache for a server that never came up
+                self._unregister_tools(server_name)
+
+    async def _start_server(self, server_name: str, server_config: dict) -> None:
+        """
+        Starts one server and waits for its handshake, up to its timeout.
+
+        If the server's tools are in the schema cache they are registered right
+        away and the handshake finishes in the background.
+        """
+        server_config = dict(server_config)
+        timeout = server_config.pop("handshakeTimeout", DEFAULT_HANDSHAKE_TIMEOUT)
+        
+        ready = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on a failed server; don't warn about its exception
+        ready.add_done_callback(lambda future: future.cancelled() or future.exception())
+        self._server_ready[server_name] = ready
+        self.starting_servers.append(server_name)
+        task = asyncio.create_task(self._hold_server(server_name, server_config, ready))
+        self._server_tasks[server_name] = task
+        
+        cached_tools = self.schema_cache.get(server_config)
+        if cached_tools is not None:
+            self._register_tools(server_name, cached_tools)
+            asyncio.create_task(self._wait_for_handshake(server_name, ready, task, timeout))
+        else:
+            await self._wait_for_handshake(server_name, ready, task, timeout)
+
     async def connect_to_servers(self):
-        """Connects to all servers configured in server_config.json."""
+        """
+        Connects to all servers configured in server_config.json concurrently.
+
+        A server that fails or does not finish its handshake within its
+        handshakeTimeout is reported in degraded_servers instead of raising,
+        so the client comes up with whichever servers are healthy. Returns
+        without waiting for servers whose tools are in the schema cache.
+        """
         try:
-            self.exit_stack = AsyncExitStack()
-            
             # Load server configuration
             with open("server_config.json", "r") as file:
                 data = json.load(file)
-            
-            servers = data.get("mcpServers", {})
-            
-            # Connect to each configured server
-            for server_name, server_config in servers.items():
-                await self.connect_to_server(server_name, server_config)
-                
         except Exception as e:
             print(f"Error loading configuration: {e}")
-            if self.exit_stack:
-                await self.exit_stack.aclose()
             raise
+        
+        servers = data.get("mcpServers", {})
+        
+        # Start every configured server at the same time
+        await asyncio.gather(*(
+            self._start_server(server_name, server_config)
+            for server_name, server_config in servers.items()
+        ))
+
+    def start(self):
+        """Connects to all servers on the background loop and waits until their tools are known."""
+        async def launch():
+            self._shutdown = asyncio.Event()
+            await self.connect_to_servers()
+        
+        try:
+            self.loop.run(launch())
+        except Exception:
+            self.loop.stop()
+            raise
+
+    def run(self, coro):
+        """
+        Runs a coroutine on the background loop from the Streamlit script thread.
+
+        The script run context is attached to the loop thread so st.* calls made
+        by the coroutine render into the current page.
+        """
+        ctx = get_script_run_ctx()
+        
+        async def with_script_context():
+            add_script_run_ctx(threading.current_thread(), ctx)
+            return await coro
+        
+        return self.loop.run(with_script_context())
+
+    def query(self, prompt: str, container=st, stream: bool = False) -> str:
+        """Processes a prompt using the already connected sessions, rendering tool calls into container."""
+        if stream:
+            return self.run(self.process_query_streaming(prompt, container))
+        return self.run(self.process_query_with_tools(prompt, container))
 
     async def execute_tool(self, tool_name: str, tool_args: dict):
         """Executes a specific tool using the appropriate session."""
-        if tool_name not in self.tool_to_session:
+        if tool_name not in self.tool_server_map:
             raise ValueError(f"Tool {tool_name} not found")
         
-        session = self.tool_to_session[tool_name]
+        if tool_name not in self.tool_to_session:
+            # Tool offered from the schema cache; wait for its server to finish starting
+            server_name = self.tool_server_map[tool_name]
+            await asyncio.shield(self._server_ready[server_name])
+        
+        session = self.tool_to_session.get(tool_name)
+        if session is None:
+            raise ValueError(f"Tool {tool_name} not found")
         
         try:
             print(f"Executing {tool_name} with arguments: {tool_args}")
@@ -104,15 +276,65 @@ class StreamlitMCPChatBot:
             print(f"Error executing {tool_name}: {e}")
             raise
 
-    async def process_query_with_tools(self, query: str):
+    async def run_tool_call(self, content, container) -> dict:
+        """Executes one tool_use block, shows it in the UI and returns its tool_result block."""
+        # Render into a box created up front, so concurrent calls don't
+        # interleave their output
+        box = container.container()
+        
+        # Show tool information in the UI
+        tool_server = self.tool_server_map.get(content.name, "Unknown")
+        box.markdown(f"### 🛠️ Using: {content.name} (Server: {tool_server})")
+        box.json(content.input)
+        
+        # Execute the tool
+        progress_placeholder = box.empty()
+        progress_placeholder.info(f"🔄 Executing {content.name}...")
+        
+        start_time = time.time()
+        try:
+            result = await self.execute_tool(content.name, content.input)
+            elapsed = time.time() - start_time
+            
+            progress_placeholder.success(f"✅ Completed in {elapsed:.1f}s")
+            
+            # Show the result
+            box.markdown("### Result:")
+            if hasattr(result, 'content'):
+                box.markdown(str(result.content))
+            else:
+                box.write(str(result))
+                
+        except Exception as tool_error:
+            elapsed = time.time() - start_time
+            progress_placeholder.error(f"❌ Error after {elapsed:.1f}s")
+            box.error(f"Error: {str(tool_error)}")
+            
+            # Create error result to continue conversation
+            result = type('ErrorResult', (), {
+                'content': f"Error executing {content.name}: {str(tool_error)}"
+            })()
+        
+        box.divider()
+        
+        return {
+            "type": "tool_result",
+            "tool_use_id": content.id,
+            "content": result.content if hasattr(result, 'content') else str(result)
+        }
+
+    async def process_query_with_tools(self, query: str, container=st):
         """
         Processes a user query using Claude AI and available MCP tools.
         Handles the complete conversation cycle including tool calls.
+
+        All tool_use blocks of one assistant turn run concurrently and their
+        results go back to Claude in a single message.
         """
         messages = [{'role': 'user', 'content': query}]
         
         # Request initial response from Claude with access to tools
-        response = self.anthropic.messages.create(
+        response = await self.anthropic.messages.create(
             max_tokens=2024,
             model='claude-3-7-sonnet-20250219',
             tools=self.available_tools,
@@ -124,6 +346,7 @@ class StreamlitMCPChatBot:
         # Process response and handle tool calls
         while True:
             assistant_content = []
+            tool_uses = []
             
             for content in response.content:
                 # Normal text content
@@ -134,81 +357,97 @@ class StreamlitMCPChatBot:
                 # Claude wants to use a tool
                 elif content.type == 'tool_use':
                     assistant_content.append(content)
-                    
-                    # Show tool information in the UI
-                    tool_server = self.tool_server_map.get(content.name, "Unknown")
-                    st.markdown(f"### 🛠️ Using: {content.name} (Server: {tool_server})")
-                    st.json(content.input)
-                    
-                    # Execute the tool
-                    progress_placeholder = st.empty()
-                    progress_placeholder.info(f"🔄 Executing {content.name}...")
-                    
-                    try:
-                        start_time = time.time()
-                        result = await self.execute_tool(content.name, content.input)
-                        elapsed = time.time() - start_time
-                        
-                        progress_placeholder.success(f"✅ Completed in {elapsed:.1f}s")
-                        
-                        # Show the result
-                        st.markdown("### Result:")
-                        if hasattr(result, 'content'):
-                            st.markdown(str(result.content))
-                        else:
-                            st.write(str(result))
-                            
-                    except Exception as tool_error:
-                        elapsed = time.time() - start_time
-                        progress_placeholder.error(f"❌ Error after {elapsed:.1f}s")
-                        st.error(f"Error: {str(tool_error)}")
-                        
-                        # Create error result to continue conversation
-                        result = type('ErrorResult', (), {
-                            'content': f"Error executing {content.name}: {str(tool_error)}"
-                        })()
-                    
-                    st.divider()
-                    
-                    # Update conversation with tool result
-                    messages.append({'role': 'assistant', 'content': assistant_content})
-                    messages.append({
-                        "role": "user",
-                        "content": [{
-                            "type": "tool_result",
-                            "tool_use_id": content.id,
-                            "content": result.content if hasattr(result, 'content') else str(result)
-                        }]
-                    })
-                    
-                    # Get next response from Claude
-                    response = self.anthropic.messages.create(
-                        max_tokens=2024,
-                        model='claude-3-7-sonnet-20250219',
-                        tools=self.available_tools,
-                        messages=messages
-                    )
-                    break
-            else:
+                    tool_uses.append(content)
+            
+            if not tool_uses:
                 # No more tools to use, end the cycle
                 break
+            
+            # Execute every requested tool at the same time, across their sessions
+            tool_results = await asyncio.gather(*(
+                self.run_tool_call(content, container) for content in tool_uses
+            ))
+            
+            # Update conversation with all tool results in one message
+            messages.append({'role': 'assistant', 'content': assistant_content})
+            messages.append({"role": "user", "content": list(tool_results)})
+            
+            # Get next response from Claude
+            response = await self.anthropic.messages.create(
+                max_tokens=2024,
+                model='claude-3-7-sonnet-20250219',
+                tools=self.available_tools,
+                messages=messages
+            )
+        
+        return full_response
+
+    async def process_query_streaming(self, query: str, container=st):
+        """
+        Processes a user query like process_query_with_tools, but streams Claude's
+        text into the UI as it arrives. Each tool starts as soon as its tool_use
+        block is complete, while the rest of the response is still streaming.
+        """
+        messages = [{'role': 'user', 'content': query}]
+        
+        full_response = ""
+        
+        while True:
+            placeholder = container.empty()
+            text = ""
+            tool_tasks = []
+            
+            def on_text(delta):
+                nonlocal text
+                text += delta
+                placeholder.markdown(text)
+            
+            def on_tool_use(content):
+                tool_tasks.append(asyncio.create_task(self.run_tool_call(content, container)))
+            
+            response = await astream_message(
+                self.anthropic, on_text, on_tool_use,
+                max_tokens=2024,
+                model='claude-3-7-sonnet-20250219',
+                tools=self.available_tools,
+                messages=messages
+            )
+            full_response += text
+            
+            if not tool_tasks:
+                break
+            
+            # Send all tool results back in a single message
+            tool_results = await asyncio.gather(*tool_tasks)
+            messages.append({'role': 'assistant', 'content': response.content})
+            messages.append({"role": "user", "content": list(tool_results)})
         
         return full_response
 
     def disconnect_all(self):
         """Disconnects from all servers and cleans up resources."""
+        async def close():
+            self._shutdown.set()
+            await asyncio.gather(*self._server_tasks.values(), return_exceptions=True)
+            await self.anthropic.close()
+        
         try:
-            if self.exit_stack:
-                asyncio.run(self.exit_stack.aclose())
+            if self._shutdown:
+                self.loop.run(close())
         except Exception as e:
             print(f"Error during disconnection: {e}")
         finally:
+            self.loop.stop()
             # Clear all references
             self.sessions.clear()
             self.tool_to_session.clear()
             self.available_tools.clear()
             self.tool_server_map.clear()
-            self.exit_stack = None
+            self.connected_servers.clear()
+            self.degraded_servers.clear()
+            self.starting_servers.clear()
+            self._server_ready.clear()
+            self._server_tasks.clear()
 
 def load_server_config():
     """Loads server configuration from JSON file."""
@@ -310,7 +549,6 @@ def main():
         st.session_state.messages = []
         st.session_state.chatbot = None
         st.session_state.available_tools = []
-        st.session_state.connected_servers = []
     
     # Sidebar for configuration
     with st.sidebar:
@@ -318,6 +556,9 @@ def main():
         # Configuration editor
         render_config_editor()
         
+        # Show Claude's answer token by token instead of all at once
+        st.session_state.stream = st.checkbox("⚡ Stream responses", value=True)
+        
         st.divider()
         
         # Connection status and controls
@@ -329,13 +570,12 @@ def main():
                 with st.spinner("Connecting to servers..."):
                     try:
                         chatbot = StreamlitMCPChatBot()
-                        asyncio.run(chatbot.connect_to_servers())
+                        chatbot.start()
                         
                         # Save information in session state
                         st.session_state.chatbot = chatbot
                         st.session_state.available_tools = chatbot.available_tools
                         st.session_state.connected = True
-                        st.session_state.connected_servers = list(set(chatbot.tool_server_map.values()))
                         
                         st.success("✅ Connected successfully!")
                         st.rerun()
@@ -344,13 +584,26 @@ def main():
                         st.error(f"❌ Connection error: {str(e)}")
         else:
             st.subheader("✅ Status: Connected")
-            st.success(f"Connected to {len(st.session_state.connected_servers)} server(s)")
+            chatbot = st.session_state.chatbot
+            st.success(f"Connected to {len(chatbot.connected_servers)} server(s)")
             
             # List of connected servers
             st.markdown("**Active servers:**")
-            for server in st.session_state.connected_servers:
+            for server in chatbot.connected_servers:
                 st.markdown(f"• {server}")
             
+            # Servers still starting in the background, with tools from the schema cache
+            if chatbot.starting_servers:
+                st.markdown("**Starting servers:**")
+                for server in chatbot.starting_servers:
+                    st.info(f"{server} (using cached tools)")
+            
+            # Servers that failed or timed out during startup
+            if chatbot.degraded_servers:
+                st.markdown("**Degraded servers:**")
+                for server, reason in chatbot.degraded_servers.items():
+                    st.warning(f"{server}: {reason}")
+            
             # Disconnect button
             if st.button("🔌 Disconnect", type="secondary"):
                 if st.session_state.chatbot:
@@ -361,7 +614,6 @@ def main():
                 st.session_state.messages = []
                 st.session_state.chatbot = None
                 st.session_state.available_tools = []
-                st.session_state.connected_servers = []
                 st.rerun()
             
             st.divider()
@@ -404,17 +656,15 @@ def main():
             with st.chat_message("user"):
                 st.markdown(prompt)
             
-            with st.chat_message("assistant"):
+            # chat_message()'s __enter__ returns None, so bind the container before entering it
+            assistant_message = st.chat_message("assistant")
+            with assistant_message:
                 try:
-                    # Create and connect chatbot in the same event loop
-                    async def handle_prompt(prompt):
-                        chatbot = StreamlitMCPChatBot()
-                        await chatbot.connect_to_servers()
-                        response = await chatbot.process_query_with_tools(prompt)
-                        return response
-
-                    response = asyncio.run(handle_prompt(prompt))
-                    st.markdown(response)
+                    # Reuse the sessions kept alive on the chatbot's event loop
+                    response = st.session_state.chatbot.query(prompt, assistant_message, st.session_state.stream)
+                    if not st.session_state.stream:
+                        # Streamed text is already on screen
+                        st.markdown(response)
                     st.session_state.messages.append({"role": "assistant", "content": response})
                 except Exception as e:
                     error_msg = f"❌ Error processing message: {str(e)}"
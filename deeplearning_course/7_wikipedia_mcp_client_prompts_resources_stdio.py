@@ -4,6 +4,7 @@ import os
 import json
 from typing import List
 from mcp.server.fastmcp import FastMCP
+from shared.storage import open_store
 
 # Initialize FastMCP server
 mcp = FastMCP("Wikipedia1 MCP")
@@ -11,6 +12,9 @@ mcp = FastMCP("Wikipedia1 MCP")
 # Directory to store Wikipedia articles
 WIKI_DIR = os.path.join(os.path.dirname(__file__), "wiki_articles")
 
+# Where articles are saved: JSON files under WIKI_DIR, or SQLite (MCP_STORAGE=sqlite)
+store = open_store(wiki_dir=WIKI_DIR)
+
 @mcp.tool()
 def search_articles(topic: str, max_results: int = 5) -> List[str]:
     """
@@ -27,10 +31,7 @@ def search_articles(topic: str, max_results: int = 5) -> List[str]:
     # Use Wikipedia to find articles
     search_results = wikipedia.search(topic, results=max_results)
     
-    # Create topic directory if it doesn't exist
     topic_dir = topic.lower().replace(" ", "_")
-    topic_path = os.path.join(WIKI_DIR, topic_dir)
-    os.makedirs(topic_path, exist_ok=True)
     
     # Store articles information
     articles_info = {}
@@ -50,10 +51,8 @@ def search_articles(topic: str, max_results: int = 5) -> List[str]:
             print(f"Error processing article '{title}': {str(e)}")
             continue
     
-    # Save articles info to JSON file
-    articles_file = os.path.join(topic_path, "articles_info.json")
-    with open(articles_file, 'w', encoding='utf-8') as f:
-        json.dump(articles_info, f, indent=2, ensure_ascii=False)
+    # Add the articles to this topic, keeping the ones saved before
+    store.save_articles(topic_dir, articles_info)
 
     return article_titles
 
@@ -85,16 +84,7 @@ def get_available_topics() -> str:
     
     This resource provides a simple list of all available topic folders.
     """
-    topics = []
-    
-    # Get all topic directories
-    if os.path.exists(WIKI_DIR):
-        for topic_dir in os.listdir(WIKI_DIR):
-            topic_path = os.path.join(WIKI_DIR, topic_dir)
-            if os.path.isdir(topic_path):
-                articles_file = os.path.join(topic_path, "articles_info.json")
-                if os.path.exists(articles_file):
-                    topics.append(topic_dir)
+    topics = store.list_article_topics()
     
     # Create a simple markdown list
     content = "# Available Wikipedia Topics\n\n"
@@ -116,14 +106,11 @@ def get_topic_articles(topic: str) -> str:
         topic: The topic to retrieve articles for
     """
     topic_dir = topic.lower().replace(" ", "_")
-    articles_file = os.path.join(WIKI_DIR, topic_dir, "articles_info.json")
-    
-    if not os.path.exists(articles_file):
-        return f"# No articles found for topic: {topic}\n\nTry searching for articles on this topic first."
     
     try:
-        with open(articles_file, 'r', encoding='utf-8') as f:
-            articles_data = json.load(f)
+        articles_data = store.get_articles(topic_dir)
+        if articles_data is None:
+            return f"# No articles found for topic: {topic}\n\nTry searching for articles on this topic first."
         
         # Create markdown content with article details
         content = f"# Wikipedia Articles on {topic.replace('_', ' ').title()}\n\n"
@@ -133,7 +120,8 @@ def get_topic_articles(topic: str) -> str:
             content += f"## {article_info['title']}\n"
             content += f"- **URL**: [{article_info['url']}]({article_info['url']})\n\n"
             content += f"### Summary\n{article_info['summary']}\n\n"
-            content += f"### Content Preview\n{article_info['content_preview']}\n\n"
+            if article_info.get("content_preview"):
+                content += f"### Content Preview\n{article_info['content_preview']}\n\n"
             content += "---\n\n"
         
         return content
@@ -1,17 +1,59 @@
-import wikipedia
+import asyncio
 import os
 import json
 from typing import List
 from mcp.server.fastmcp import FastMCP
+from shared.mediawiki import Disambiguation, MediaWikiClient, PageNotFound, content_preview
+from shared.pagination import DEFAULT_PAGE_CHARS, paginate
+from shared.render_cache import RenderCache
+from shared.single_flight import SingleFlight
+from shared.storage import open_store
+from shared.topic_aliases import TopicAliases, normalize_topic
+from shared.wiki_cache import ContentCache
+from shared.wiki_pages import afetch_summaries
 
 # Initialize FastMCP server
 mcp = FastMCP("Wikipedia MCP", host="0.0.0.0", port=8000)
 
 # Directory to store Wikipedia articles
-WIKI_DIR = os.path.join(os.path.dirname(__file__), "wiki_articles")
+# (MCP_WIKI_DIR moves it elsewhere, e.g. a scratch directory for benchmarks)
+WIKI_DIR = os.getenv("MCP_WIKI_DIR") or os.path.join(os.path.dirname(__file__), "wiki_articles")
+
+# Cache of fetched pages shared by all tools, kept in memory and under WIKI_DIR
+content_cache = ContentCache(os.path.join(WIKI_DIR, ".cache"))
+
+# Async MediaWiki API client with a shared keep-alive pool and a cap on requests in flight
+wiki = MediaWikiClient()
+
+# Identical tool calls and page fetches in flight at the same time share one upstream request
+flights = SingleFlight()
+
+def fetch_page(title: str):
+    """Fetch a page through the cache, joining a fetch of the same page already in flight."""
+    return flights.do(("page", title.strip()), lambda: content_cache.afetch(title, wiki.page))
+
+# Where articles are saved: JSON files under WIKI_DIR, or SQLite (MCP_STORAGE=sqlite)
+store = open_store(wiki_dir=WIKI_DIR)
+
+# Rendered wiki:// resources, kept until the articles behind them change
+rendered = RenderCache()
+
+# Equivalent topics ("usa", "Estados Unidos") share the canonical topic their search resolved to
+aliases = TopicAliases(os.path.join(WIKI_DIR, "topic_aliases.json"))
+
+def topic_dir_for(topic: str) -> str:
+    """The stored topic for a requested one: its canonical topic, or the folder an older version saved it under."""
+    canonical = aliases.canonical(topic)
+    legacy = topic.lower().replace(" ", "_")
+    if legacy != canonical:
+        topics = store.list_article_topics()
+        if canonical not in topics and legacy in topics:
+            return legacy
+    return canonical
 
 @mcp.tool()
-def search_articles(topic: str, max_results: int = 5) -> List[str]:
+@flights.coalesce(topic=normalize_topic)
+async def search_articles(topic: str, max_results: int = 5) -> List[str]:
     """
     Search for articles on Wikipedia based on a topic and store their information.
     
@@ -23,60 +65,160 @@ def search_articles(topic: str, max_results: int = 5) -> List[str]:
         List of article titles found in the search
     """
     
-    # Use Wikipedia to find articles
-    search_results = wikipedia.search(topic, results=max_results)
+    # An equivalent topic was searched before: its pages are already saved
+    known = aliases.get(topic)
+    if known and len(known["titles"]) >= max_results:
+        saved = await asyncio.to_thread(store.get_articles, known["canonical"]) or {}
+        titles = known["titles"][:max_results]
+        if all(title in saved for title in titles):
+            return titles
     
-    # Create topic directory if it doesn't exist
-    topic_dir = topic.lower().replace(" ", "_")
-    topic_path = os.path.join(WIKI_DIR, topic_dir)
-    os.makedirs(topic_path, exist_ok=True)
+    # Use Wikipedia to find articles
+    search_results = await wiki.search(topic, limit=max_results)
     
     # Store articles information
     articles_info = {}
     article_titles = []
     
-    for title in search_results:
-        try:
-            page = wikipedia.page(title)
-            articles_info[title] = {
-                "title": page.title,
-                "url": page.url,
-                "summary": page.summary[:500] + "..." if len(page.summary) > 500 else page.summary,
-                "content_preview": page.content[:1000] + "..." if len(page.content) > 1000 else page.content
-            }
-            article_titles.append(title)
-        except Exception as e:
-            print(f"Error processing article '{title}': {str(e)}")
+    # Lead sections of all results in one multi-title request; pages already cached aren't fetched again.
+    # Full text isn't fetched here, so the first get_article_content of a result
+    # still goes to Wikipedia; from then on the page is served from content_cache.
+    pages = await afetch_summaries(search_results, wiki.summaries, content_cache)
+    
+    for title, page in pages.items():
+        if isinstance(page, Exception):
+            print(f"Error processing article '{title}': {str(page)}")
             continue
+        # Keyed by the page a title resolved to, so redirects don't duplicate it
+        article = {
+            "title": page.title,
+            "url": page.url,
+            "summary": page.summary[:500] + "..." if len(page.summary) > 500 else page.summary,
+        }
+        # Only pages whose full text is already cached have text past the summary to preview
+        preview = content_preview(page)
+        if preview:
+            article["content_preview"] = preview
+        articles_info[page.title] = article
+        article_titles.append(page.title)
     
-    # Save articles info to JSON file
-    articles_file = os.path.join(topic_path, "articles_info.json")
-    with open(articles_file, 'w', encoding='utf-8') as f:
-        json.dump(articles_info, f, indent=2, ensure_ascii=False)
+    # Save under the topic of the best matching page, so equivalent topics share one folder
+    topic_dir = normalize_topic(article_titles[0]) if article_titles else aliases.canonical(topic)
+    # Saving may wait on another writer's lock; keep that off the event loop
+    await asyncio.to_thread(store.save_articles, topic_dir, articles_info)
+    if article_titles:
+        await asyncio.to_thread(aliases.learn, topic, topic_dir, article_titles)
 
     return article_titles
 
 @mcp.tool()
-def get_article_content(article_title: str) -> str:
+@flights.coalesce()
+async def get_article_content(article_title: str, offset: int = 0, max_chars: int = DEFAULT_PAGE_CHARS) -> str:
     """
-    Get the full content of a Wikipedia article.
+    Get the content of a Wikipedia article, one page of text at a time.
+    
+    The full article is fetched once and cached, so reading further pages
+    doesn't go back to Wikipedia.
     
     Args:
         article_title: The title of the article to retrieve
+        offset: Character to start from; pass the next_cursor of the previous call to continue (default: 0)
+        max_chars: Maximum number of characters to return (default: 2000)
         
     Returns:
-        String with article content if found, error message if not found
+        JSON string with title, offset, content, total_chars and next_cursor
+        (null at the end of the article), error message if not found
     """
     try:
-        page = wikipedia.page(article_title)
-        return page.content[:2000] + "..." if len(page.content) > 2000 else page.content
-    except wikipedia.exceptions.DisambiguationError as e:
+        page = await fetch_page(article_title)
+        return json.dumps({"title": page.title, **paginate(page.content, offset, max_chars)}, indent=2, ensure_ascii=False)
+    except Disambiguation as e:
         return f"Disambiguation error: '{article_title}' may refer to multiple articles. Options: {', '.join(e.options[:5])}"
-    except wikipedia.exceptions.PageError:
+    except PageNotFound:
         return f"Page error: No article found with title '{article_title}'"
     except Exception as e:
         return f"Error retrieving article: {str(e)}"
 
+@mcp.tool()
+@flights.coalesce()
+async def get_articles_content(titles: List[str], max_chars: int = DEFAULT_PAGE_CHARS) -> str:
+    """
+    Get the summaries of several Wikipedia articles in one call.
+    
+    Only the summary (the lead section, before the first heading) of each
+    article is returned, not its full text: Wikipedia hands out full text one
+    article per request, summaries up to 20 per request. Use get_article_content
+    to read an article's full text.
+    
+    Args:
+        titles: The titles of the articles to retrieve
+        max_chars: Maximum number of characters to return per summary (default: 2000)
+        
+    Returns:
+        JSON string with "found" (requested title -> title, url and summary)
+        and "missing" (requested title -> why it couldn't be retrieved)
+    """
+    titles = list(dict.fromkeys(title.strip() for title in titles))
+    pages = await afetch_summaries(titles, wiki.summaries, content_cache)
+    
+    result = {"found": {}, "missing": {}}
+    for title, page in pages.items():
+        if isinstance(page, Exception):
+            result["missing"][title] = str(page)
+            continue
+        result["found"][title] = {"title": page.title, "url": page.url, "summary": page.summary[:max_chars]}
+    return json.dumps(result, indent=2, ensure_ascii=False)
+
+@mcp.tool()
+def search_local(query: str, max_results: int = 5) -> str:
+    """
+    Search the articles already saved by search_articles, without calling Wikipedia.
+    
+    Args:
+        query: Words to look for in article titles, summaries and previews
+        max_results: Maximum number of results to return (default: 5)
+        
+    Returns:
+        JSON string with the best matching articles, best first
+    """
+    results = store.search("articles", query, max_results)
+    if not results:
+        return f"No saved articles match '{query}'. Use search_articles to fetch some from Wikipedia."
+    return json.dumps(results, indent=2, ensure_ascii=False)
+
+def render_topics() -> str:
+    """Markdown list of every topic with saved articles."""
+    topics = store.list_article_topics()
+    
+    parts = ["# Available Wikipedia Topics\n\n"]
+    if topics:
+        parts.extend(f"- {topic.replace('_', ' ').title()}\n" for topic in topics)
+        parts.append("\nUse wiki://<topic> to access articles in that topic.\n")
+    else:
+        parts.append("No topics found. Search for articles first to create topics.\n")
+    return "".join(parts)
+
+def render_topic_articles(topic: str, topic_dir: str) -> str:
+    """Markdown page with the details of every saved article on a topic."""
+    articles_data = store.get_articles(topic_dir)
+    if articles_data is None:
+        return f"# No articles found for topic: {topic}\n\nTry searching for articles on this topic first."
+    
+    parts = [
+        f"# Wikipedia Articles on {topic.replace('_', ' ').title()}\n\n",
+        f"Total articles: {len(articles_data)}\n\n",
+    ]
+    for article_title, article_info in articles_data.items():
+        parts.append(
+            f"## {article_info['title']}\n"
+            f"- **URL**: [{article_info['url']}]({article_info['url']})\n\n"
+            f"### Summary\n{article_info['summary']}\n\n"
+        )
+        if article_info.get("content_preview"):
+            parts.append(f"### Content Preview\n{article_info['content_preview']}\n\n")
+        parts.append("---\n\n")
+    return "".join(parts)
+
 @mcp.resource("wiki://topics")
 def get_available_topics() -> str:
     """
@@ -84,27 +226,23 @@ def get_available_topics() -> str:
     
     This resource provides a simple list of all available topic folders.
     """
-    topics = []
-    
-    # Get all topic directories
-    if os.path.exists(WIKI_DIR):
-        for topic_dir in os.listdir(WIKI_DIR):
-            topic_path = os.path.join(WIKI_DIR, topic_dir)
-            if os.path.isdir(topic_path):
-                articles_file = os.path.join(topic_path, "articles_info.json")
-                if os.path.exists(articles_file):
-                    topics.append(topic_dir)
-    
-    # Create a simple markdown list
-    content = "# Available Wikipedia Topics\n\n"
-    if topics:
-        for topic in topics:
-            content += f"- {topic.replace('_', ' ').title()}\n"
-        content += f"\nUse wiki://<topic> to access articles in that topic.\n"
-    else:
-        content += "No topics found. Search for articles first to create topics.\n"
+    # Served from memory until a topic is added or removed
+    return rendered.get("wiki://topics", store.topics_version(), render_topics)
+
+@mcp.resource("stats://cache")
+def get_cache_stats() -> str:
+    """
+    Counters of the server's caches, as JSON.
     
-    return content
+    Shows how often pages were served from memory or disk instead of Wikipedia,
+    how many tool calls joined one already in flight, and how often resources
+    were rendered again.
+    """
+    return json.dumps({
+        "content_cache": content_cache.stats(),
+        "single_flight": flights.stats(),
+        "rendered_resources": rendered.stats(),
+    }, indent=2)
 
 @mcp.resource("wiki://{topic}")
 def get_topic_articles(topic: str) -> str:
@@ -114,28 +252,15 @@ def get_topic_articles(topic: str) -> str:
     Args:
         topic: The topic to retrieve articles for
     """
-    topic_dir = topic.lower().replace(" ", "_")
-    articles_file = os.path.join(WIKI_DIR, topic_dir, "articles_info.json")
-    
-    if not os.path.exists(articles_file):
-        return f"# No articles found for topic: {topic}\n\nTry searching for articles on this topic first."
+    topic_dir = topic_dir_for(topic)
     
     try:
-        with open(articles_file, 'r', encoding='utf-8') as f:
-            articles_data = json.load(f)
-        
-        # Create markdown content with article details
-        content = f"# Wikipedia Articles on {topic.replace('_', ' ').title()}\n\n"
-        content += f"Total articles: {len(articles_data)}\n\n"
-        
-        for article_title, article_info in articles_data.items():
-            content += f"## {article_info['title']}\n"
-            content += f"- **URL**: [{article_info['url']}]({article_info['url']})\n\n"
-            content += f"### Summary\n{article_info['summary']}\n\n"
-            content += f"### Content Preview\n{article_info['content_preview']}\n\n"
-            content += "---\n\n"
-        
-        return content
+        # Re-rendered only when the topic's files change (mtime and size)
+        return rendered.get(
+            ("wiki://", topic),
+            store.articles_version(topic_dir),
+            lambda: render_topic_articles(topic, topic_dir),
+        )
     except json.JSONDecodeError:
         return f"# Error reading articles data for {topic}\n\nThe articles data file is corrupted."
     except Exception as e:
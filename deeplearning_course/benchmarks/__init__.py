@@ -0,0 +1,9 @@
+"""
+Offline benchmarks for the course servers.
+
+backends serves local stand-ins for the MediaWiki and arXiv APIs; run drives
+the servers through the MCP client against them and reports latency,
+throughput and memory as JSON. Run from deeplearning_course/:
+
+    python -m benchmarks.run --calls 50 --concurrency 4 --latency 0.05
+"""
@@ -0,0 +1,219 @@
+import argparse
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+# Defaults for the stand-in responses
+DEFAULT_LATENCY = 0.0         # seconds added to every response
+DEFAULT_WIKI_CHARS = 20000    # characters of plain text per Wikipedia article
+DEFAULT_ARXIV_CHARS = 1500    # characters per arXiv abstract
+# Results the arXiv stand-in claims to have for any search
+ARXIV_TOTAL_RESULTS = 1000
+
+WIKI_PATH = "/w/api.php"
+ARXIV_PATH = "/api/query"
+WORDS = (
+    "network layer model training data gradient learning neural attention "
+    "weights loss function optimizer sequence vector representation memory"
+).split()
+
+
+def _filler(seed: str, chars: int) -> str:
+    """Deterministic prose of about `chars` characters, different for each seed."""
+    start = zlib.crc32(seed.encode("utf-8"))
+    words: List[str] = []
+    length = 0
+    while length < chars:
+        word = WORDS[(start + len(words) * 7) % len(WORDS)]
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:chars]
+
+
+def article_text(title: str, chars: int) -> str:
+    """Plain-text article with a lead section and "== Section ==" headings, like a TextExtracts extract."""
+    lead = f"{title} is an article served by the benchmark stand-in. " + _filler(title, min(600, chars // 4))
+    parts = [lead]
+    section = 1
+    while sum(len(part) for part in parts) < chars:
+        body = _filler(f"{title}/{section}", 1500)
+        parts.append(f"\n\n== Section {section} ==\n{body}")
+        section += 1
+    return "".join(parts)[:max(chars, len(lead))]
+
+
+def paper_id_for(query: str, index: int) -> str:
+    """The ID of the index-th result of an arXiv search, stable for a given query."""
+    return f"2501.{(zlib.crc32(query.encode('utf-8')) + index) % 100000:05d}"
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Local HTTP server answering like the MediaWiki API (WIKI_PATH) and the arXiv API (ARXIV_PATH).
+
+    Every response is delayed by latency seconds and article text and
+    abstracts are as long as configured, so upstream cost can be dialed in
+    without the network. requests counts the requests per API.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = DEFAULT_LATENCY,
+        wiki_chars: int = DEFAULT_WIKI_CHARS,
+        arxiv_chars: int = DEFAULT_ARXIV_CHARS,
+    ):
+        super().__init__((host, port), StandInHandler)
+        self.latency = latency
+        self.wiki_chars = wiki_chars
+        self.arxiv_chars = arxiv_chars
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that point the servers at this stand-in."""
+        return {
+            "WIKI_API_URL": self.base_url + WIKI_PATH,
+            "ARXIV_API_URL": self.base_url + ARXIV_PATH,
+        }
+
+    def count(self, api: str) -> None:
+        with self._lock:
+            self.requests[api] += 1
+
+    def start(self) -> "StandInServer":
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server: StandInServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == WIKI_PATH:
+            self.server.count("wiki")
+            body, content_type = json.dumps(self._mediawiki(params)).encode("utf-8"), "application/json"
+        elif url.path == ARXIV_PATH:
+            self.server.count("arxiv")
+            body, content_type = self._arxiv(params).encode("utf-8"), "application/atom+xml"
+        else:
+            self.send_error(404)
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _mediawiki(self, params: Dict[str, str]) -> dict:
+        if params.get("list") == "search":
+            query = params.get("srsearch", "").strip().title()
+            limit = int(params.get("srlimit", 10))
+            return {"query": {"search": [{"ns": 0, "title": f"{query} {i + 1}"} for i in range(limit)]}}
+
+        pages = []
+        for title in params.get("titles", "").split("|"):
+            text = article_text(title, self.server.wiki_chars)
+            page = {
+                "title": title,
+                "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+                "pageprops": {},
+            }
+            if "extracts" in params.get("prop", ""):
+                page["extract"] = text.split("\n\n==", 1)[0] if params.get("exintro") else text
+            pages.append(page)
+        return {"query": {"pages": pages}}
+
+    def _arxiv(self, params: Dict[str, str]) -> str:
+        start = int(params.get("start", 0))
+        page_size = int(params.get("max_results", 10))
+        id_list = [paper_id for paper_id in params.get("id_list", "").split(",") if paper_id]
+        if id_list:
+            ids = id_list[start:start + page_size]
+            total = len(id_list)
+        else:
+            query = params.get("search_query", "")
+            ids = [paper_id_for(query, i) for i in range(start, min(start + page_size, ARXIV_TOTAL_RESULTS))]
+            total = ARXIV_TOTAL_RESULTS
+        entries = "".join(self._arxiv_entry(paper_id) for paper_id in ids)
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:arxiv="http://arxiv.org/schemas/atom"'
+            ' xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+            "<title>arXiv stand-in</title>"
+            f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+            f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+            f"<opensearch:itemsPerPage>{len(ids)}</opensearch:itemsPerPage>"
+            f"{entries}</feed>"
+        )
+
+    def _arxiv_entry(self, paper_id: str) -> str:
+        published = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=zlib.crc32(paper_id.encode()) % 500000)
+        stamp = published.strftime("%Y-%m-%dT%H:%M:%SZ")
+        return (
+            "<entry>"
+            f"<id>http://arxiv.org/abs/{paper_id}v1</id>"
+            f"<updated>{stamp}</updated><published>{stamp}</published>"
+            f"<title>Stand-in paper {escape(paper_id)}</title>"
+            f"<summary>{escape(_filler(paper_id, self.server.arxiv_chars))}</summary>"
+            "<author><name>Ada Lovelace</name></author><author><name>Alan Turing</name></author>"
+            f'<link href="http://arxiv.org/abs/{paper_id}v1" rel="alternate" type="text/html"/>'
+            f'<link title="pdf" href="http://arxiv.org/pdf/{paper_id}v1" rel="related" type="application/pdf"/>'
+            '<arxiv:primary_category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>'
+            '<category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>'
+            "</entry>"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for the MediaWiki and arXiv APIs")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="Seconds added to every response (default: 0)")
+    parser.add_argument("--wiki-chars", type=int, default=DEFAULT_WIKI_CHARS, help=f"Characters per article (default: {DEFAULT_WIKI_CHARS})")
+    parser.add_argument("--arxiv-chars", type=int, default=DEFAULT_ARXIV_CHARS, help=f"Characters per abstract (default: {DEFAULT_ARXIV_CHARS})")
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port, args.latency, args.wiki_chars, args.arxiv_chars)
+    print("Point the servers at the stand-ins with:")
+    for name, value in server.env().items():
+        print(f"  export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
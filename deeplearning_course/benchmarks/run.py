@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from benchmarks.backends import DEFAULT_ARXIV_CHARS, DEFAULT_WIKI_CHARS, StandInServer
+
+COURSE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each server and the tool calls that exercise it, in order. Call i gets
+# arguments(i, earlier), where earlier lists the text items returned by the
+# tools before it, e.g. the paper IDs search_papers found and saved.
+Workload = List[Tuple[str, Callable[[int, List[str]], dict]]]
+SERVERS: Dict[str, Tuple[str, Workload]] = {
+    "wikipedia": ("7_wikipedia_mcp_server_stdio_prompts_resources.py", [
+        ("search_articles", lambda i, earlier: {"topic": f"benchmark topic {i}", "max_results": 5}),
+        ("get_article_content", lambda i, earlier: {"article_title": f"Benchmark Article {i}"}),
+    ]),
+    "arxiv": ("3_arxiv_mcp_server.py", [
+        ("search_papers", lambda i, earlier: {"topic": f"benchmark topic {i}", "max_results": 5}),
+        # Papers the searches saved, so this times the indexed lookup rather than a backfill from arXiv
+        ("extract_info", lambda i, earlier: {"paper_id": earlier[i % len(earlier)]}),
+    ]),
+}
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], elapsed: float) -> dict:
+    """Latency percentiles (ms) and throughput (calls/s) for one batch of calls."""
+    ordered = sorted(latencies)
+    return {
+        "calls": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        "throughput_per_s": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def timed_calls(call: Callable[[int], object], calls: int, concurrency: int) -> dict:
+    """
+    Make `calls` calls, at most `concurrency` at a time, and summarize them.
+
+    call(i) returns an awaitable; a call that raises or returns an MCP error
+    result counts as an error but its latency is still recorded.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with slots:
+            start = time.perf_counter()
+            try:
+                result = await call(i)
+                if getattr(result, "isError", False):
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return {**summarize(latencies, time.perf_counter() - start), "errors": errors}
+
+
+def process_memory(pid: int) -> Dict[str, Optional[int]]:
+    """Current and peak resident set size of a process in KiB (Linux only, else None)."""
+    memory: Dict[str, Optional[int]] = {"rss_kb": None, "peak_rss_kb": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    memory["rss_kb"] = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    memory["peak_rss_kb"] = int(line.split()[1])
+    except OSError:
+        pass
+    return memory
+
+
+def find_child(script: str) -> Optional[int]:
+    """PID of the child process of this one running script, or None where /proc isn't available."""
+    try:
+        pids = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return None
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                command = f.read().split(b"\0")
+        except (OSError, ValueError, IndexError):
+            continue
+        if parent == os.getpid() and any(arg.endswith(script.encode()) for arg in command):
+            return int(pid)
+    return None
+
+
+def server_env(backend: StandInServer, data_dir: str) -> Dict[str, str]:
+    """Environment for a server under test: stand-in APIs, scratch data directories, no rate limit."""
+    env = dict(os.environ)
+    env.update(backend.env())
+    env.update(
+        MCP_WIKI_DIR=os.path.join(data_dir, "wiki_articles"),
+        MCP_PAPER_DIR=os.path.join(data_dir, "papers"),
+        MCP_SQLITE_PATH=os.path.join(data_dir, "research.db"),
+        # The stand-in doesn't need arXiv's politeness delay
+        ARXIV_RATE="1000",
+        ARXIV_BURST="1000",
+    )
+    return env
+
+
+async def bench_server(
+    name: str, backend: StandInServer, calls: int, concurrency: int, repeat: bool, errlog=None
+) -> dict:
+    """Start one server over stdio against the stand-ins and time each tool of its workload."""
+    script, workload = SERVERS[name]
+    with tempfile.TemporaryDirectory() as data_dir, open(os.devnull, "w") as devnull:
+        params = StdioServerParameters(
+            command=sys.executable,
+            args=[os.path.join(COURSE_DIR, script)],
+            env=server_env(backend, data_dir),
+            cwd=data_dir,
+        )
+        start = time.perf_counter()
+        async with stdio_client(params, errlog=errlog or devnull) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                startup_ms = round((time.perf_counter() - start) * 1000, 2)
+                pid = find_child(script)
+
+                tools = []
+                # Text items returned by the tools timed so far
+                earlier: List[str] = []
+                for tool, arguments in workload:
+                    returned: List[str] = []
+
+                    async def call(i: int, tool=tool, arguments=arguments, returned=returned):
+                        result = await session.call_tool(tool, arguments(0 if repeat else i, earlier))
+                        returned.extend(item.text for item in result.content if getattr(item, "text", None))
+                        return result
+                    # One untimed call first, so imports and first-use setup aren't counted
+                    await call(calls)
+                    upstream_before = sum(backend.requests.values())
+                    stats = await timed_calls(call, calls, concurrency)
+                    upstream = sum(backend.requests.values()) - upstream_before
+                    stats["upstream_requests_per_call"] = round(upstream / calls, 2)
+                    tools.append({"tool": tool, **stats})
+                    earlier.extend(returned)
+
+                memory = process_memory(pid) if pid else {"rss_kb": None, "peak_rss_kb": None}
+
+    return {"server": name, "script": script, "startup_ms": startup_ms, "server_memory": memory, "tools": tools}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=COURSE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    backend = StandInServer(latency=args.latency, wiki_chars=args.wiki_chars, arxiv_chars=args.arxiv_chars).start()
+    try:
+        results = [
+            await bench_server(name, backend, args.calls, args.concurrency, args.repeat, sys.stderr if args.server_logs else None)
+            for name in args.servers
+        ]
+    finally:
+        backend.stop()
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": {
+            "calls": args.calls,
+            "concurrency": args.concurrency,
+            "repeat": args.repeat,
+            "latency_s": args.latency,
+            "wiki_chars": args.wiki_chars,
+            "arxiv_chars": args.arxiv_chars,
+            "storage": os.getenv("MCP_STORAGE", "json"),
+        },
+        "results": results,
+        "client_peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the course servers against local API stand-ins")
+    parser.add_argument("--servers", nargs="+", choices=sorted(SERVERS), default=sorted(SERVERS), help="Servers to benchmark (default: all)")
+    parser.add_argument("--calls", type=int, default=50, help="Timed calls per tool (default: 50)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Calls in flight at once (default: 4)")
+    parser.add_argument("--repeat", action="store_true", help="Use the same arguments for every call, to measure the cached path")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stand-ins add to every response (default: 0)")
+    parser.add_argument("--wiki-chars", type=int, default=DEFAULT_WIKI_CHARS, help=f"Characters per article (default: {DEFAULT_WIKI_CHARS})")
+    parser.add_argument("--arxiv-chars", type=int, default=DEFAULT_ARXIV_CHARS, help=f"Characters per abstract (default: {DEFAULT_ARXIV_CHARS})")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--server-logs", action="store_true", help="Show the servers' stderr instead of discarding it")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
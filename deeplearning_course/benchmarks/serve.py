@@ -0,0 +1,42 @@
+import argparse
+import importlib.util
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+COURSE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SCRIPT = "7_wikipedia_mcp_server_stdio_prompts_resources.py"
+
+
+def load_server(script: str) -> FastMCP:
+    """Import a course server script without running it and return its FastMCP instance."""
+    path = os.path.join(COURSE_DIR, script)
+    spec = importlib.util.spec_from_file_location("server_under_test", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.mcp
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a course server over any transport, overriding its FastMCP settings")
+    parser.add_argument("--script", default=DEFAULT_SCRIPT, help=f"Server script in deeplearning_course/ (default: {DEFAULT_SCRIPT})")
+    parser.add_argument("--transport", choices=["stdio", "sse", "streamable-http"], default="stdio", help="Transport to serve (default: stdio)")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface for the HTTP transports (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port for the HTTP transports (default: 8000)")
+    parser.add_argument("--json-response", action="store_true", help="streamable-http: answer with plain JSON instead of an SSE stream")
+    parser.add_argument("--stateless", action="store_true", help="streamable-http: no session kept between requests")
+    parser.add_argument("--log-level", default="WARNING", help="Server log level (default: WARNING)")
+    args = parser.parse_args()
+
+    # The same server code for every transport; only the settings differ
+    mcp = load_server(args.script)
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    mcp.settings.json_response = args.json_response
+    mcp.settings.stateless_http = args.stateless
+    mcp.settings.log_level = args.log_level
+    mcp.run(transport=args.transport)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from benchmarks.backends import DEFAULT_WIKI_CHARS, StandInServer
+from benchmarks.run import (
+    COURSE_DIR, find_child, git_commit, process_memory, server_env, summarize, timed_calls,
+)
+from benchmarks.serve import DEFAULT_SCRIPT
+
+# Every transport the course servers ship with, and the streamable-HTTP variants
+TRANSPORTS: Dict[str, dict] = {
+    "stdio": {"transport": "stdio"},
+    "sse": {"transport": "sse"},
+    "streamable-http/sse/stateful": {"transport": "streamable-http", "json_response": False, "stateless": False},
+    "streamable-http/sse/stateless": {"transport": "streamable-http", "json_response": False, "stateless": True},
+    "streamable-http/json/stateful": {"transport": "streamable-http", "json_response": True, "stateless": False},
+    "streamable-http/json/stateless": {"transport": "streamable-http", "json_response": True, "stateless": True},
+}
+
+# The same tool and resource requests for every transport. They are made once
+# before timing, so every timed request is served from the server's caches
+# and what is left is the cost of the transport and the server itself.
+WORKLOAD = [
+    ("tool", "search_articles", {"topic": "benchmark topic", "max_results": 5}),
+    ("tool", "get_article_content", {"article_title": "Benchmark Topic 1"}),
+    ("resource", "wiki://topics", None),
+    ("resource", "wiki://benchmark_topic_1", None),
+]
+# Seconds to wait for an HTTP server to accept connections
+STARTUP_TIMEOUT = 30.0
+
+
+def request(session: ClientSession, kind: str, name: str, arguments: Optional[dict]):
+    if kind == "tool":
+        return session.call_tool(name, arguments)
+    return session.read_resource(name)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before accepting connections")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server didn't accept connections on port {port} within {STARTUP_TIMEOUT}s")
+
+
+def serve_args(config: dict, port: int) -> List[str]:
+    """Command line of benchmarks.serve for one transport configuration."""
+    args = [sys.executable, "-m", "benchmarks.serve", "--script", DEFAULT_SCRIPT, "--transport", config["transport"]]
+    if config["transport"] != "stdio":
+        args += ["--port", str(port)]
+    if config.get("json_response"):
+        args.append("--json-response")
+    if config.get("stateless"):
+        args.append("--stateless")
+    return args
+
+
+class Target:
+    """One transport under test: starts the server (for HTTP) and opens client sessions to it."""
+
+    def __init__(self, config: dict, env: Dict[str, str], cwd: str, errlog):
+        self.config = config
+        self.env = env
+        self.cwd = cwd
+        self.errlog = errlog
+        self.port = free_port()
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self) -> float:
+        """Start an HTTP server and wait until it listens. Returns the seconds that took (0 for stdio)."""
+        if self.config["transport"] == "stdio":
+            return 0.0
+        start = time.perf_counter()
+        self.process = subprocess.Popen(
+            serve_args(self.config, self.port), env=self.env, cwd=self.cwd,
+            stdout=self.errlog, stderr=self.errlog,
+        )
+        wait_for_port(self.port, self.process)
+        return time.perf_counter() - start
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def server_pid(self) -> Optional[int]:
+        if self.process is not None:
+            return self.process.pid
+        return find_child("benchmarks.serve")
+
+    @asynccontextmanager
+    async def session(self):
+        """An initialized client session. For stdio every session starts its own server process."""
+        transport = self.config["transport"]
+        if transport == "stdio":
+            params = StdioServerParameters(command=sys.executable, args=serve_args(self.config, 0)[1:], env=self.env, cwd=self.cwd)
+            streams = stdio_client(params, errlog=self.errlog)
+        elif transport == "sse":
+            streams = sse_client(f"http://127.0.0.1:{self.port}/sse")
+        else:
+            streams = streamablehttp_client(f"http://127.0.0.1:{self.port}/mcp")
+        async with streams as (read, write, *_):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+
+
+async def bench_transport(name: str, target: Target, handshakes: int, calls: int, levels: List[int]) -> dict:
+    """Handshake cost, per-request latency and concurrency scaling for one transport."""
+    startup = target.start()
+    try:
+        # Handshake: connect and initialize a new session, then close it
+        handshake_times = []
+        for _ in range(handshakes):
+            start = time.perf_counter()
+            async with target.session():
+                handshake_times.append(time.perf_counter() - start)
+
+        async with target.session() as session:
+            for kind, request_name, arguments in WORKLOAD:
+                await request(session, kind, request_name, arguments)
+
+            # Per-request latency, one request at a time
+            per_request = {}
+            for kind, request_name, arguments in WORKLOAD:
+                stats = await timed_calls(lambda i: request(session, kind, request_name, arguments), calls, 1)
+                per_request[f"{kind}:{request_name}"] = stats
+
+            # Scaling: the whole workload mix with more and more requests in flight
+            scaling = []
+            for level in levels:
+                def mixed(i: int):
+                    kind, request_name, arguments = WORKLOAD[i % len(WORKLOAD)]
+                    return request(session, kind, request_name, arguments)
+                stats = await timed_calls(mixed, calls * len(WORKLOAD), level)
+                scaling.append({"concurrency": level, **stats})
+
+            pid = target.server_pid()
+            memory = process_memory(pid) if pid else {"rss_kb": None, "peak_rss_kb": None}
+    finally:
+        target.stop()
+
+    return {
+        "transport": name,
+        "settings": TRANSPORTS[name],
+        "server_startup_ms": round(startup * 1000, 2),
+        "handshake": summarize(handshake_times, sum(handshake_times)),
+        "per_request": per_request,
+        "scaling": scaling,
+        "server_memory": memory,
+    }
+
+
+async def run(args) -> dict:
+    backend = StandInServer(latency=args.latency, wiki_chars=args.wiki_chars).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as data_dir, open(os.devnull, "w") as devnull:
+            env = server_env(backend, data_dir)
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [COURSE_DIR, env.get("PYTHONPATH")]))
+            for name in args.transports:
+                # Each transport starts from an empty data directory
+                run_dir = tempfile.mkdtemp(dir=data_dir)
+                env.update(MCP_WIKI_DIR=os.path.join(run_dir, "wiki_articles"))
+                target = Target(TRANSPORTS[name], dict(env), run_dir, sys.stderr if args.server_logs else devnull)
+                results.append(await bench_transport(name, target, args.handshakes, args.calls, args.levels))
+    finally:
+        backend.stop()
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "settings": {
+            "handshakes": args.handshakes,
+            "calls": args.calls,
+            "levels": args.levels,
+            "latency_s": args.latency,
+            "wiki_chars": args.wiki_chars,
+            "storage": os.getenv("MCP_STORAGE", "json"),
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the MCP transports on the same Wikipedia server and workload")
+    parser.add_argument("--transports", nargs="+", choices=list(TRANSPORTS), default=list(TRANSPORTS), help="Transports to compare (default: all)")
+    parser.add_argument("--handshakes", type=int, default=5, help="New sessions opened to time the handshake (default: 5)")
+    parser.add_argument("--calls", type=int, default=50, help="Timed calls per request in the workload (default: 50)")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16], help="Concurrency levels for the scaling runs (default: 1 4 16)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stand-ins add to every response (default: 0)")
+    parser.add_argument("--wiki-chars", type=int, default=DEFAULT_WIKI_CHARS, help=f"Characters per article (default: {DEFAULT_WIKI_CHARS})")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--server-logs", action="store_true", help="Show the servers' output instead of discarding it")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+import arxiv
+import requests
+
+# Defaults, each overridable through the environment (or .env)
+DEFAULT_API_URL = "https://export.arxiv.org/api/query"  # ARXIV_API_URL: arXiv API endpoint
+DEFAULT_RATE = 1 / 3       # ARXIV_RATE: requests per second (arXiv asks for one every 3 seconds)
+DEFAULT_BURST = 1          # ARXIV_BURST: requests allowed back to back after an idle period
+DEFAULT_MAX_RETRIES = 3    # ARXIV_MAX_RETRIES: retries on throttling and connection errors
+# Responses that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+# Seconds to pause after the first throttled response; doubles with each retry
+BACKOFF_SECONDS = 3.0
+# arXiv identifiers, new style (2301.01234v2) and old style (hep-th/9901001v1)
+PAPER_ID_PATTERN = re.compile(r"^(\d{4}\.\d{4,5}|[a-z][a-z\-]*(\.[A-Z]{2})?/\d{7})(v\d+)?$")
+
+
+def _env(name: str, default, cast):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket whose rate adapts to throttling.
+
+    acquire() blocks until a token is free. A throttled response halves the
+    rate and pauses everyone for a while; every success adds back a tenth of
+    the maximum rate, so the rate settles just under what the server accepts.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.min_rate = min_rate or rate / 8
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        # Callers waiting for a token right now
+        self.waiting = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take a token, waiting as long as needed. Returns the seconds waited."""
+        start = time.monotonic()
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        return now - start
+                    self._cond.wait(max(self._paused_until - now, (1 - self._tokens) / self.rate))
+            finally:
+                self.waiting -= 1
+
+    def throttled(self, pause: float) -> None:
+        """The server pushed back: halve the rate and hold all requests for pause seconds."""
+        with self._cond:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._cond.notify_all()
+
+    def succeeded(self) -> None:
+        """A request went through: creep back towards the maximum rate."""
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class RateLimitedSession(requests.Session):
+    """
+    requests.Session whose GET requests all pass through one adaptive token bucket.
+
+    A 429 or 503 response slows the bucket down and pauses the requests after
+    it, for BACKOFF_SECONDS doubled with each throttled response in a row; the
+    response itself is returned, for the caller to retry.
+    """
+
+    def __init__(self, limiter: TokenBucket):
+        super().__init__()
+        self.limiter = limiter
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        # Throttled responses since the last one that went through
+        self._throttled_in_a_row = 0
+
+    def get(self, url, **kwargs):
+        waited = self.limiter.acquire()
+        if waited > 1:
+            # stderr: stdout is the JSON-RPC channel of the stdio servers
+            print(f"arXiv request waited {waited:.1f}s for its turn ({self.limiter.waiting} still queued)", file=sys.stderr)
+        with self._stats_lock:
+            self.requests += 1
+        response = super().get(url, **kwargs)
+        with self._stats_lock:
+            if response.status_code in THROTTLE_STATUSES:
+                self.throttled += 1
+                pause = BACKOFF_SECONDS * 2 ** self._throttled_in_a_row
+                self._throttled_in_a_row += 1
+            else:
+                pause = None
+                self._throttled_in_a_row = 0
+        if pause is None:
+            self.limiter.succeeded()
+        else:
+            self.limiter.throttled(pause)
+        return response
+
+
+class RateLimitedClient(arxiv.Client):
+    """
+    arxiv.Client whose requests all pass through one adaptive token bucket.
+
+    Meant to be shared by every search in the process (see get_client), so the
+    politeness delay and the HTTP session carry over between tool calls, and
+    concurrent searches queue instead of getting throttled. A queued request
+    blocks its thread for as long as it waits (3 seconds per request ahead
+    of it at the default rate), so async servers should call it from a
+    worker thread. 429 and 503
+    responses slow the bucket down and are retried with exponential backoff.
+
+    The bucket sits in the HTTP session the library sends its requests
+    through, rather than in an override of the library's request methods, so
+    it doesn't depend on their private signatures. Retries are the library's
+    own (num_retries); each retry waits for the bucket like any request.
+
+    Arguments left as None come from the ARXIV_* environment variables, then
+    from the defaults above. Point ARXIV_API_URL at a local stand-in to run
+    without the network.
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        page_size: int = 100,
+    ):
+        max_retries = max_retries if max_retries is not None else _env("ARXIV_MAX_RETRIES", DEFAULT_MAX_RETRIES, int)
+        # The bucket replaces the library's fixed delay between requests
+        super().__init__(page_size=page_size, delay_seconds=0, num_retries=max_retries)
+        api_url = api_url or _env("ARXIV_API_URL", DEFAULT_API_URL, str)
+        self.query_url_format = api_url + "?{}"
+        self.limiter = TokenBucket(
+            rate or _env("ARXIV_RATE", DEFAULT_RATE, float),
+            burst or _env("ARXIV_BURST", DEFAULT_BURST, int),
+        )
+        self.max_retries = max_retries
+        # The library sends every request through self._session (arxiv 2.x to 4.x, see
+        # pyproject.toml). Fail loudly if a new version stops doing so, instead of silently
+        # sending requests around the bucket.
+        if not isinstance(getattr(self, "_session", None), requests.Session):
+            raise RuntimeError(
+                f"arxiv {getattr(arxiv, '__version__', '')} has no Client._session to rate-limit; "
+                "install a version pinned in pyproject.toml"
+            )
+        self._session = RateLimitedSession(self.limiter)
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests waiting for the rate limiter right now."""
+        return self.limiter.waiting
+
+    def stats(self) -> Dict[str, float]:
+        with self._session._stats_lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "rate": self.limiter.rate,
+                "max_rate": self.limiter.max_rate,
+                "requests": self._session.requests,
+                "throttled": self._session.throttled,
+            }
+
+
+_client: Optional[RateLimitedClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> RateLimitedClient:
+    """The process-wide arXiv client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RateLimitedClient()
+        return _client
+
+
+def paper_record(paper: arxiv.Result) -> dict:
+    """The information the course saves about a paper."""
+    return {
+        'title': paper.title,
+        'authors': [author.name for author in paper.authors],
+        'summary': paper.summary,
+        'pdf_url': paper.pdf_url,
+        'published': str(paper.published.date())
+    }
+
+
+def _without_version(paper_id: str) -> str:
+    return re.sub(r"v\d+$", "", paper_id)
+
+
+def fetch_papers(paper_ids: List[str], client: Optional[arxiv.Client] = None) -> Dict[str, dict]:
+    """
+    Fetch several papers by ID with a single arXiv request.
+
+    IDs may include a version or not. IDs that aren't valid arXiv identifiers
+    are skipped without a request, so one typo doesn't fail the whole batch.
+
+    Returns:
+        Dict mapping each requested ID that arXiv knows to its paper record
+    """
+    wanted = [paper_id.strip() for paper_id in paper_ids if PAPER_ID_PATTERN.match(paper_id.strip())]
+    if not wanted:
+        return {}
+    search = arxiv.Search(id_list=wanted, max_results=len(wanted))
+    fetched = {}
+    for paper in (client or get_client()).results(search):
+        short_id = paper.get_short_id()
+        fetched[short_id] = paper
+        fetched.setdefault(_without_version(short_id), paper)
+    return {
+        paper_id: paper_record(fetched[paper_id])
+        for paper_id in wanted if paper_id in fetched
+    }
@@ -0,0 +1,40 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+# One lock per path for the threads of this process; flock only works between processes
+_thread_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """
+    Hold an exclusive lock on lock_path across threads and processes.
+
+    Threads of one process queue on a threading.Lock; processes (e.g. several
+    server workers) queue on an flock of the lock file, which the OS releases
+    if the holder dies. The lock file itself stays empty and is never removed,
+    so every process always locks the same inode.
+    """
+    lock_path = os.path.abspath(lock_path)
+    with _registry_lock:
+        thread_lock = _thread_locks.setdefault(lock_path, threading.Lock())
+
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        with open(lock_path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
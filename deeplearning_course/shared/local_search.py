@@ -0,0 +1,85 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Hashable, List, Tuple
+
+# Standard Okapi BM25 parameters
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words of a text, accents kept."""
+    return re.findall(r"\w+", (text or "").lower(), flags=re.UNICODE)
+
+
+class InvertedIndex:
+    """
+    In-memory inverted index with BM25 ranking.
+
+    Documents can be added, replaced and removed one at a time, so the index
+    can follow the store as new records are saved.
+    """
+
+    def __init__(self, k1: float = K1, b: float = B):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        # term -> {doc key: term frequency}
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        # doc key -> (term counts, payload)
+        self._docs: Dict[Hashable, Tuple[Counter, object]] = {}
+        # doc key -> number of terms
+        self._lengths: Dict[Hashable, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _remove(self, key: Hashable) -> None:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        terms, _ = doc
+        self._total_length -= self._lengths.pop(key)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+
+    def add(self, key: Hashable, text: str, payload: object = None) -> None:
+        """Index a document, replacing any document with the same key."""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self._remove(key)
+            self._docs[key] = (terms, payload)
+            self._lengths[key] = sum(terms.values())
+            self._total_length += self._lengths[key]
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[key] = count
+
+    def remove(self, key: Hashable) -> None:
+        """Drop a document from the index."""
+        with self._lock:
+            self._remove(key)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Hashable, float, object]]:
+        """Return (key, score, payload) for the best matching documents, best first."""
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            scores: Dict[Hashable, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[key] / avg_length)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / norm
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [(key, score, self._docs[key][1]) for key, score in best]
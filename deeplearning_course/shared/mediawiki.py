@@ -0,0 +1,210 @@
+import asyncio
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Union
+
+import httpx
+
+from shared.wiki_cache import PageData
+
+# Defaults, each overridable through the environment (or .env)
+DEFAULT_API_URL = "https://en.wikipedia.org/w/api.php"  # WIKI_API_URL: MediaWiki API endpoint
+DEFAULT_TIMEOUT = 10.0         # WIKI_TIMEOUT: seconds for one API request
+DEFAULT_MAX_CONNECTIONS = 20   # WIKI_MAX_CONNECTIONS: connections kept in the pool
+DEFAULT_MAX_CONCURRENCY = 10   # WIKI_MAX_CONCURRENCY: API requests in flight at once
+USER_AGENT = "deeplearning-mcp-course/1.0 (https://github.com/davila7/deeplearning-mcp)"
+# Lead-section extracts the API returns per request (TextExtracts' exlimit)
+SUMMARIES_PER_REQUEST = 20
+# Characters of article text past the lead section saved as a search result's preview
+PREVIEW_CHARS = 1000
+
+
+class MediaWikiError(Exception):
+    """The MediaWiki API returned an error."""
+
+
+class PageNotFound(MediaWikiError):
+    """No page exists with the requested title."""
+
+
+class Disambiguation(MediaWikiError):
+    """The title leads to a disambiguation page; options lists the pages it points to."""
+
+    def __init__(self, title: str, options: List[str]):
+        if options:
+            super().__init__(f"'{title}' may refer to: {', '.join(options[:5])}")
+        else:
+            super().__init__(f"'{title}' is a disambiguation page")
+        self.title = title
+        self.options = options
+
+
+class PageSummary(NamedTuple):
+    """A page's URL and lead section, as fetched in bulk by MediaWikiClient.summaries."""
+    title: str
+    url: str
+    summary: str
+
+
+def _env(name: str, default, cast):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+def summary_of(content: str) -> str:
+    """The lead section of a plain-text extract: everything before the first heading."""
+    return re.split(r"\n+==[^=\n].*==\n", content, maxsplit=1)[0].strip()
+
+
+def content_preview(page, max_chars: int = PREVIEW_CHARS) -> Optional[str]:
+    """
+    The start of a page's text after its lead section, or None for a page fetched without its full text.
+
+    The lead section is what search results save as their summary, so the
+    preview starts where the summary stops.
+    """
+    content = getattr(page, "content", None)
+    if not content:
+        return None
+    body = content[len(summary_of(content)):].strip()
+    return body[:max_chars] + "..." if len(body) > max_chars else body
+
+
+class MediaWikiClient:
+    """
+    Async client for the MediaWiki API with one shared keep-alive connection pool.
+
+    A semaphore bounds the requests in flight, so any number of concurrent tool
+    calls can wait on it without holding threads or opening more connections.
+    Arguments left as None come from the WIKI_* environment variables, then
+    from the defaults above.
+
+    Like any httpx.AsyncClient, the pool belongs to the event loop that first
+    uses it, so create and use the client on a single loop.
+    """
+
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.api_url = api_url or _env("WIKI_API_URL", DEFAULT_API_URL, str)
+        timeout = timeout or _env("WIKI_TIMEOUT", DEFAULT_TIMEOUT, float)
+        max_connections = max_connections or _env("WIKI_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS, int)
+        max_concurrency = max_concurrency or _env("WIKI_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY, int)
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"User-Agent": USER_AGENT},
+        )
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def _query(self, **params) -> dict:
+        params.update(action="query", format="json", formatversion=2)
+        async with self._slots:
+            response = await self._http.get(self.api_url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise MediaWikiError(data["error"].get("info", str(data["error"])))
+        return data
+
+    async def search(self, query: str, limit: int = 5) -> List[str]:
+        """Return the titles of the pages that best match a query."""
+        data = await self._query(list="search", srsearch=query, srlimit=limit, srprop="")
+        return [result["title"] for result in data.get("query", {}).get("search", [])]
+
+    async def page(self, title: str) -> PageData:
+        """
+        Fetch a page's URL and plain-text content in one request, following redirects.
+
+        Raises PageNotFound for a missing page and Disambiguation for a
+        disambiguation page.
+        """
+        data = await self._query(
+            titles=title,
+            prop="extracts|info|pageprops",
+            explaintext=1,
+            inprop="url",
+            ppprop="disambiguation",
+            redirects=1,
+        )
+        pages = data.get("query", {}).get("pages", [])
+        if not pages or pages[0].get("missing") or pages[0].get("invalid"):
+            raise PageNotFound(f"No article found with title '{title}'")
+        page = pages[0]
+        if "disambiguation" in page.get("pageprops", {}):
+            raise Disambiguation(title, await self._links(page["title"]))
+        content = page.get("extract", "")
+        return PageData(title=page["title"], url=page["fullurl"], summary=summary_of(content), content=content)
+
+    async def summaries(self, titles: List[str]) -> Dict[str, Union[PageSummary, MediaWikiError]]:
+        """
+        Fetch the URL and lead section of many pages with multi-title requests.
+
+        Titles are sent SUMMARIES_PER_REQUEST at a time, so ten pages cost one
+        request; the batches run concurrently. Full page text isn't available
+        this way (the API returns it for one page per request), so use page()
+        for that.
+
+        Returns:
+            Dict mapping each requested title to its PageSummary, or to the
+            PageNotFound / Disambiguation error for that title
+        """
+        titles = list(dict.fromkeys(titles))
+        batches = [titles[i:i + SUMMARIES_PER_REQUEST] for i in range(0, len(titles), SUMMARIES_PER_REQUEST)]
+        results: Dict[str, Union[PageSummary, MediaWikiError]] = {}
+        for batch_results in await asyncio.gather(*(self._summaries(batch) for batch in batches)):
+            results.update(batch_results)
+        return {title: results[title] for title in titles}
+
+    async def _summaries(self, titles: List[str]) -> Dict[str, Union[PageSummary, MediaWikiError]]:
+        params = dict(
+            titles="|".join(titles),
+            prop="extracts|info|pageprops",
+            exintro=1,
+            explaintext=1,
+            exlimit=SUMMARIES_PER_REQUEST,
+            inprop="url",
+            ppprop="disambiguation",
+            redirects=1,
+        )
+        pages: Dict[str, dict] = {}
+        renamed: Dict[str, str] = {}
+        while True:
+            data = await self._query(**params)
+            query = data.get("query", {})
+            for rename in query.get("normalized", []) + query.get("redirects", []):
+                renamed[rename["from"]] = rename["to"]
+            for page in query.get("pages", []):
+                merged = pages.setdefault(page["title"], {})
+                merged.update({key: value for key, value in page.items() if key != "extract" or value})
+            # Long extracts can spill into continuation requests
+            if "continue" not in data:
+                break
+            params.update(data["continue"])
+
+        results: Dict[str, Union[PageSummary, MediaWikiError]] = {}
+        for title in titles:
+            resolved = renamed.get(title, title)
+            resolved = renamed.get(resolved, resolved)
+            page = pages.get(resolved)
+            if page is None or page.get("missing") or page.get("invalid"):
+                results[title] = PageNotFound(f"No article found with title '{title}'")
+            elif "disambiguation" in page.get("pageprops", {}):
+                results[title] = Disambiguation(title, [])
+            else:
+                results[title] = PageSummary(
+                    title=page["title"], url=page["fullurl"], summary=page.get("extract", "").strip()
+                )
+        return results
+
+    async def _links(self, title: str) -> List[str]:
+        data = await self._query(titles=title, prop="links", plnamespace=0, pllimit="max")
+        pages = data.get("query", {}).get("pages", [])
+        return [link["title"] for link in pages[0].get("links", [])] if pages else []
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
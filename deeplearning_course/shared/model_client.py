@@ -0,0 +1,49 @@
+import os
+from typing import Optional
+
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+# Defaults, each overridable through the environment (or .env)
+DEFAULT_REQUEST_TIMEOUT = 120.0   # MODEL_REQUEST_TIMEOUT: seconds for one model request
+DEFAULT_CONNECT_TIMEOUT = 10.0    # MODEL_CONNECT_TIMEOUT: seconds to open a connection
+DEFAULT_MAX_CONNECTIONS = 10      # MODEL_MAX_CONNECTIONS: concurrent connections in the pool
+DEFAULT_MAX_KEEPALIVE = 5         # MODEL_MAX_KEEPALIVE: idle connections kept open for reuse
+DEFAULT_MAX_RETRIES = 2           # MODEL_MAX_RETRIES: retries on connection errors, 429 and 5xx
+
+
+def _env(name: str, default, cast):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+def create_async_client(
+    request_timeout: Optional[float] = None,
+    connect_timeout: Optional[float] = None,
+    max_connections: Optional[int] = None,
+    max_keepalive: Optional[int] = None,
+    max_retries: Optional[int] = None,
+) -> AsyncAnthropic:
+    """
+    Build an AsyncAnthropic client with a bounded, keep-alive connection pool.
+
+    Model calls made with it don't block the event loop, so they overlap with
+    the MCP sessions living on the same loop. Arguments left as None come from
+    the MODEL_* environment variables, then from the defaults above.
+
+    The pool is bound to the event loop that first uses the client, so create
+    and use it on a single loop.
+    """
+    request_timeout = request_timeout or _env("MODEL_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT, float)
+    connect_timeout = connect_timeout or _env("MODEL_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT, float)
+    max_connections = max_connections or _env("MODEL_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS, int)
+    max_keepalive = max_keepalive or _env("MODEL_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE, int)
+    if max_retries is None:
+        max_retries = _env("MODEL_MAX_RETRIES", DEFAULT_MAX_RETRIES, int)
+
+    timeout = httpx.Timeout(request_timeout, connect=connect_timeout)
+    http_client = DefaultAsyncHttpxClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+    )
+    return AsyncAnthropic(http_client=http_client, timeout=timeout, max_retries=max_retries)
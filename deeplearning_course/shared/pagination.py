@@ -0,0 +1,36 @@
+# Characters returned per call when the caller doesn't ask for a size
+DEFAULT_PAGE_CHARS = 2000
+
+
+def paginate(text: str, offset: int = 0, max_chars: int = DEFAULT_PAGE_CHARS) -> dict:
+    """
+    Cut one page out of a long text.
+
+    The page ends at a line break or a space when there is one in its second
+    half, so words aren't split between calls.
+
+    Args:
+        text: The full text
+        offset: Character the page starts at
+        max_chars: Maximum length of the page
+
+    Returns:
+        Dict with offset, content, total_chars and next_cursor: the offset of
+        the next page, or None when this page reaches the end
+    """
+    offset = max(0, min(offset, len(text)))
+    max_chars = max(1, max_chars)
+    end = min(len(text), offset + max_chars)
+    if end < len(text):
+        half = offset + max_chars // 2
+        cut = text.rfind("\n", half, end)
+        if cut == -1:
+            cut = text.rfind(" ", half, end)
+        if cut != -1:
+            end = cut + 1
+    return {
+        "offset": offset,
+        "content": text[offset:end],
+        "total_chars": len(text),
+        "next_cursor": end if end < len(text) else None,
+    }
@@ -0,0 +1,219 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from shared.record_log import RecordLog
+
+INDEX_FILE = "paper_index.json"
+PAPERS_FILE = "papers_info.json"
+# Topics whose records are kept in memory for lookups
+MAX_CACHED_TOPICS = 256
+
+
+class PaperIndex:
+    """
+    On-disk index from paper ID to the topic it was saved under.
+
+    The topic files (papers/<topic>/papers_info.json and its .jsonl log) stay
+    the source of truth and the only place records are kept. For every topic
+    the index remembers the mtime and size of those files and the IDs in it,
+    so a topic that was changed outside the server is re-read on the next
+    lookup.
+
+    The index itself is a RecordLog keyed by topic: a save appends the one
+    topic entry that changed, so its cost doesn't grow with the number of
+    topics. Records of recently looked up topics are kept in memory until
+    their files change.
+    """
+
+    def __init__(self, paper_dir: str):
+        self.paper_dir = paper_dir
+        self._log = RecordLog(os.path.join(paper_dir, INDEX_FILE))
+        self._lock = threading.Lock()
+        # topic -> {"mtime_ns": [...], "size": [...], "ids": [paper ids]}
+        self._topics: Dict[str, dict] = {}
+        # paper id -> topic
+        self._papers: Dict[str, str] = {}
+        # topic -> (signature, records), least recently used first
+        self._records: "OrderedDict[str, tuple]" = OrderedDict()
+        self._load()
+
+    def _topic_file(self, topic: str) -> RecordLog:
+        return RecordLog(os.path.join(self.paper_dir, topic, PAPERS_FILE))
+
+    def _load(self) -> None:
+        """Load the saved index and reconcile it with the topic files."""
+        topics = self._log.load()
+        # Indexes written by older versions hold {"topics": ..., "papers": ...} with full records
+        outdated = any(not isinstance(entry, dict) or "ids" not in entry for entry in topics.values())
+        with self._lock:
+            if not outdated:
+                for topic, entry in topics.items():
+                    self._index_topic(topic, entry["ids"], entry)
+            changed = self._refresh()
+            if outdated:
+                self._log.compact(self._topics)
+            else:
+                self._save(changed)
+
+    def _save(self, topics: List[str]) -> None:
+        """Append the entries of these topics (None for the dropped ones) to the index log."""
+        if topics:
+            os.makedirs(self.paper_dir, exist_ok=True)
+            self._log.append({topic: self._topics.get(topic) for topic in topics})
+
+    def _index_topic(self, topic: str, ids: List[str], signature: Optional[dict]) -> None:
+        self._drop_topic(topic)
+        for paper_id in ids:
+            self._papers[paper_id] = topic
+        self._topics[topic] = {
+            "mtime_ns": (signature or {}).get("mtime_ns"),
+            "size": (signature or {}).get("size"),
+            "ids": list(ids),
+        }
+
+    def _drop_topic(self, topic: str) -> None:
+        self._records.pop(topic, None)
+        old = self._topics.pop(topic, None)
+        if not old:
+            return
+        for paper_id in old.get("ids", []):
+            if self._papers.get(paper_id) == topic:
+                del self._papers[paper_id]
+
+    def _is_current(self, topic: str) -> bool:
+        known = self._topics.get(topic)
+        signature = self._topic_file(topic).signature()
+        return (
+            known is not None
+            and signature is not None
+            and known.get("mtime_ns") == signature["mtime_ns"]
+            and known.get("size") == signature["size"]
+        )
+
+    def _topic_records(self, topic: str) -> Dict[str, dict]:
+        """The records of a topic, from memory while its files are unchanged."""
+        topic_file = self._topic_file(topic)
+        signature = topic_file.signature()
+        cached = self._records.get(topic)
+        if cached is not None and cached[0] == signature:
+            self._records.move_to_end(topic)
+            return cached[1]
+        records = topic_file.load()
+        self._remember(topic, signature, records)
+        return records
+
+    def _remember(self, topic: str, signature: Optional[dict], records: Dict[str, dict]) -> None:
+        self._records[topic] = (signature, records)
+        self._records.move_to_end(topic)
+        while len(self._records) > MAX_CACHED_TOPICS:
+            self._records.popitem(last=False)
+
+    def _refresh(self) -> List[str]:
+        """
+        Re-read every topic file whose mtime or size changed since it was indexed.
+
+        Only stats the files; a topic is parsed again only when it changed.
+        Returns the topics whose index entry changed or was dropped.
+        """
+        changed = []
+        seen = set()
+        try:
+            entries = list(os.scandir(self.paper_dir))
+        except FileNotFoundError:
+            entries = []
+
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            topic = entry.name
+            topic_file = self._topic_file(topic)
+            signature = topic_file.signature()
+            if signature is None:
+                continue
+            seen.add(topic)
+            if self._is_current(topic):
+                continue
+            records = topic_file.load()
+            self._index_topic(topic, list(records), signature)
+            self._remember(topic, signature, records)
+            changed.append(topic)
+
+        for topic in list(self._topics):
+            if topic not in seen:
+                self._drop_topic(topic)
+                changed.append(topic)
+
+        # Papers saved under several topics may have lost their entry when one
+        # of those topics was dropped or re-read; point them at a remaining topic.
+        if changed:
+            for topic, info in self._topics.items():
+                for paper_id in info.get("ids", []):
+                    self._papers.setdefault(paper_id, topic)
+        return changed
+
+    def update(self, topic: str, papers_info: dict, signature: Optional[dict] = None) -> None:
+        """
+        Record the papers just written to a topic file.
+
+        signature is the one the topic files had right after that write. Passing
+        it keeps concurrent saves from pairing an older papers_info with a newer
+        file: the topic then simply looks changed and is re-read on lookup.
+        """
+        with self._lock:
+            if signature is None:
+                signature = self._topic_file(topic).signature()
+            self._index_topic(topic, list(papers_info), signature)
+            self._remember(topic, signature, papers_info)
+            self._save([topic])
+
+    def _record(self, paper_id: str, current: Dict[str, bool]) -> Optional[dict]:
+        """The record of an indexed paper whose topic is unchanged, or None. current caches _is_current per topic."""
+        topic = self._papers.get(paper_id)
+        if topic is None:
+            return None
+        if topic not in current:
+            current[topic] = self._is_current(topic)
+        if not current[topic]:
+            return None
+        return self._topic_records(topic).get(paper_id)
+
+    def lookup(self, paper_id: str) -> Optional[dict]:
+        """
+        Return the saved record for a paper, or None if it is not stored.
+
+        A hit costs one dict lookup and a stat of the paper's topic files (plus
+        reading them, if they aren't in memory). A miss re-checks the topic
+        files in case one was written outside the server.
+        """
+        return self.lookup_many([paper_id]).get(paper_id)
+
+    def lookup_many(self, paper_ids: List[str]) -> Dict[str, dict]:
+        """
+        Return the saved records of several papers at once, leaving out the ones not stored.
+
+        Each topic file involved is stat'ed once, and the topic files are
+        re-checked at most once for all the misses together.
+        """
+        with self._lock:
+            current: Dict[str, bool] = {}
+            found: Dict[str, dict] = {}
+            missing = []
+            for paper_id in paper_ids:
+                record = self._record(paper_id, current)
+                if record is not None:
+                    found[paper_id] = record
+                else:
+                    missing.append(paper_id)
+
+            if missing:
+                changed = self._refresh()
+                if changed:
+                    self._save(changed)
+                    current = {}
+                    for paper_id in missing:
+                        record = self._record(paper_id, current)
+                        if record is not None:
+                            found[paper_id] = record
+            return found
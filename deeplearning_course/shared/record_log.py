@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from shared.file_lock import file_lock
+
+# Fold the log back into the snapshot once it holds this many lines
+COMPACT_AFTER = 200
+# Unlocked reads tried before a reader waits for the writers' lock instead
+READ_ATTEMPTS = 5
+
+
+def write_json_atomic(path: str, data, **dump_args) -> None:
+    """Write JSON to a temporary file and rename it over path, so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, **dump_args)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class RecordLog:
+    """
+    A topic's records as a JSON snapshot plus an append-only JSONL log.
+
+    The snapshot (e.g. papers_info.json) keeps the layout the course has always
+    used, and is written as soon as a topic is created. Later new and changed
+    records are appended to a log next to it (papers_info.jsonl), one
+    {"id": ..., "record": ...} line each, so a save writes only what changed
+    instead of rewriting the whole topic. Reading replays the log over the
+    snapshot. Once the log grows past COMPACT_AFTER lines it is folded into a
+    new snapshot, written with an atomic rename.
+
+    Reads take no lock. A read that overlaps a write (e.g. it opened the old
+    snapshot just before a compaction removed the log) sees the files'
+    signature change and starts over.
+
+    Writes hold a lock on <snapshot>.lock, so concurrent saves to one topic,
+    from threads or from separate server processes, are applied one at a time
+    and none is lost. A record of None removes its key.
+    """
+
+    def __init__(self, path: str, compact_after: int = COMPACT_AFTER, **dump_args):
+        self.path = path
+        self.log_path = path + "l"
+        self.lock_path = path + ".lock"
+        self.compact_after = compact_after
+        # How the snapshot is formatted, e.g. indent=2
+        self.dump_args = dump_args
+        self._log_lines = 0
+        # Signature of the files right after this object's last save
+        self.saved_signature: Optional[dict] = None
+        # Whether the log ends in a torn line that the next append must not extend
+        self._torn = False
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or os.path.exists(self.log_path)
+
+    def signature(self) -> Optional[dict]:
+        """mtime and size of the snapshot and the log, or None if neither exists."""
+        stats = []
+        for path in (self.path, self.log_path):
+            try:
+                stats.append(os.stat(path))
+            except OSError:
+                stats.append(None)
+        if not any(stats):
+            return None
+        return {
+            "mtime_ns": [stat.st_mtime_ns if stat else 0 for stat in stats],
+            "size": [stat.st_size if stat else 0 for stat in stats],
+        }
+
+    def load(self) -> Dict[str, dict]:
+        """
+        Return every record: the snapshot with the log replayed over it.
+
+        The read is repeated while the files change underneath it; after
+        READ_ATTEMPTS tries it waits for the writers' lock and reads under it.
+        """
+        for _ in range(READ_ATTEMPTS):
+            before = self.signature()
+            records = self._read()
+            if self.signature() == before:
+                return records
+        with file_lock(self.lock_path):
+            return self._read()
+
+    def _read(self) -> Dict[str, dict]:
+        """One pass over the snapshot and the log, with no consistency check. Writers call it under the lock."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            records = {}
+
+        self._log_lines = 0
+        self._torn = False
+        try:
+            with open(self.log_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._log_lines += 1
+                    self._torn = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from an interrupted append
+                        continue
+                    if entry["record"] is None:
+                        records.pop(entry["id"], None)
+                    else:
+                        records[entry["id"]] = entry["record"]
+        except FileNotFoundError:
+            pass
+        return records
+
+    def upsert(self, records: Dict[str, dict]) -> Dict[str, dict]:
+        """
+        Save new and changed records, keeping the others.
+
+        Only records that differ from the saved ones are written, in a single
+        append. Returns every record of the topic after the save.
+        """
+        with file_lock(self.lock_path):
+            current = self._upsert(records)
+            self.saved_signature = self.signature()
+            return current
+
+    def _upsert(self, records: Dict[str, dict]) -> Dict[str, dict]:
+        # Re-read under the lock: another writer may have appended since
+        current = self._read()
+        changed = {key: record for key, record in records.items() if current.get(key) != record}
+        if not changed:
+            return current
+        current.update(changed)
+        for key in [key for key, record in changed.items() if record is None]:
+            del current[key]
+
+        if not os.path.exists(self.path):
+            # A new topic starts with its snapshot, so readers of the plain JSON file see it
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._compact(current)
+            return current
+        self._append_lines(changed)
+        if self._log_lines >= self.compact_after:
+            self._compact(current)
+        return current
+
+    def append(self, records: Dict[str, Optional[dict]]) -> None:
+        """
+        Append records to the log without reading the saved ones first.
+
+        For callers that already know what changed, so a save costs the size of
+        the change rather than the size of the file. The snapshot is only read
+        when the log is due for compaction.
+        """
+        if not records:
+            return
+        with file_lock(self.lock_path):
+            # Only the log is read, to count its lines and spot a torn end
+            try:
+                with open(self.log_path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                data = b""
+            self._log_lines = data.count(b"\n") + (0 if data.endswith(b"\n") or not data else 1)
+            self._torn = bool(data) and not data.endswith(b"\n")
+            self._append_lines(records)
+            if self._log_lines >= self.compact_after:
+                self._compact(self._read())
+            self.saved_signature = self.signature()
+
+    def _append_lines(self, records: Dict[str, Optional[dict]]) -> None:
+        """Append one line per record in a single write. Caller holds the lock."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        lines = [json.dumps({"id": key, "record": record}, ensure_ascii=False) + "\n" for key, record in records.items()]
+        data = (("\n" if self._torn else "") + "".join(lines)).encode("utf-8")
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._log_lines += len(records)
+        self._torn = False
+
+    def compact(self, records: Optional[Dict[str, dict]] = None) -> None:
+        """
+        Fold the log into a new snapshot, or, given records, replace everything saved with them.
+
+        The snapshot is replaced atomically before the log is removed. A crash in
+        between leaves a log that replays to the same records, so nothing is lost.
+        """
+        with file_lock(self.lock_path):
+            self._compact(self._read() if records is None else records)
+
+    def _compact(self, records: Dict[str, dict]) -> None:
+        write_json_atomic(self.path, records, **self.dump_args)
+        try:
+            os.remove(self.log_path)
+        except FileNotFoundError:
+            pass
+        self._log_lines = 0
@@ -0,0 +1,46 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+# Rendered documents kept before the least recently used ones are dropped
+DEFAULT_MAX_ENTRIES = 256
+
+
+class RenderCache:
+    """
+    Memoizes rendered documents (e.g. MCP resources) by the version of their source.
+
+    A version is any cheap value that changes with the data, such as the mtime
+    and size of a file. While it stays the same, the rendered text is returned
+    from memory; when it changes, the document is rendered again.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (version, rendered text)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version, render: Callable[[], str]) -> str:
+        """Return the rendering of key for this version, calling render() only if it changed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        text = render()
+        with self._lock:
+            self._entries[key] = (version, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return text
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,73 @@
+import asyncio
+import functools
+import inspect
+import json
+from typing import Awaitable, Callable, Dict, Hashable
+
+
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+class SingleFlight:
+    """
+    Coalesces identical async calls that are in flight at the same time.
+
+    The first call for a key runs; calls with the same key that arrive before
+    it finishes wait for that same run and get its result (or its exception).
+    Nothing is cached afterwards: the next call once it is done runs again.
+
+    The shared run is a separate task, so a caller that is cancelled (e.g. its
+    client disconnected) doesn't cancel it for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """Run fn() for key, or join the run already in flight for key."""
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._done(key, task))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def coalesce(self, **normalizers: Callable):
+        """
+        Decorator for async tools: identical concurrent calls share one run.
+
+        Calls are identical when the tool name and its arguments, with defaults
+        filled in, match. String arguments are stripped, unless a normalizer is
+        given for that argument name, e.g. coalesce(topic=normalize_topic).
+        """
+        def decorator(fn):
+            signature = inspect.signature(fn)
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = {
+                    name: normalizers.get(name, _strip)(value)
+                    for name, value in bound.arguments.items()
+                }
+                key = (fn.__name__, json.dumps(arguments, sort_keys=True, default=str))
+                return await self.do(key, lambda: fn(*args, **kwargs))
+
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, int]:
+        return {"leaders": self.leaders, "followers": self.followers, "in_flight": len(self._inflight)}
@@ -0,0 +1,188 @@
+import asyncio
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import anyio
+import httpx
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+# Seconds between pings on an idle session
+DEFAULT_KEEPALIVE_INTERVAL = 15.0
+# Seconds to wait for a ping reply, or for a (re)connection
+DEFAULT_CONNECT_TIMEOUT = 10.0
+# Seconds to wait for the reply to any request, so a call can never hang
+DEFAULT_READ_TIMEOUT = 120.0
+# Longest pause between reconnection attempts
+MAX_RECONNECT_DELAY = 30.0
+
+# Errors that mean the stream is gone, as opposed to a tool or protocol error
+CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    httpx.HTTPError,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Whether an error means the stream is gone, including MCP's "Connection closed" error."""
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class PersistentSSESession:
+    """
+    One long-lived MCP session to an SSE server, shared by every caller.
+
+    A single owner task opens the SSE stream and the ClientSession, pings the
+    server every keepalive_interval seconds and reconnects with backoff when
+    the stream drops. Calls made while the stream is down wait for the next
+    connection, and a call that fails because the stream dropped is retried
+    once on the new session.
+
+    Calls in flight when the owner task tears a session down fail right away
+    rather than waiting for a reply that will never come, and every request
+    gives up after read_timeout seconds in any case.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        keepalive_interval: float = DEFAULT_KEEPALIVE_INTERVAL,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ):
+        self.server_url = server_url
+        self.keepalive_interval = keepalive_interval
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.reconnects = 0
+        self._session: Optional[ClientSession] = None
+        # Set when the current session is torn down, to fail the calls still waiting on it
+        self._lost: Optional[asyncio.Event] = None
+        self._connected: Optional[asyncio.Event] = None
+        self._reconnect: Optional[asyncio.Event] = None
+        self._closed: Optional[asyncio.Event] = None
+        # Set together with _closed or _reconnect to interrupt the keep-alive wait
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_error: Optional[BaseException] = None
+
+    def _ensure_started(self) -> None:
+        if self._task is None:
+            self._connected = asyncio.Event()
+            self._reconnect = asyncio.Event()
+            self._closed = asyncio.Event()
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Owner task: keeps a session open, pinging it and reconnecting as needed."""
+        delay = 1.0
+        while not self._closed.is_set():
+            try:
+                async with sse_client(self.server_url) as streams:
+                    read_timeout = timedelta(seconds=self.read_timeout)
+                    async with ClientSession(streams[0], streams[1], read_timeout_seconds=read_timeout) as session:
+                        await asyncio.wait_for(session.initialize(), self.connect_timeout)
+                        self._lost = asyncio.Event()
+                        self._session = session
+                        self._last_error = None
+                        self._reconnect.clear()
+                        self._wake.clear()
+                        self._connected.set()
+                        delay = 1.0
+                        await self._keep_alive(session)
+            except Exception as e:
+                self._last_error = e
+                print(f"Lost connection to {self.server_url}: {e}")
+            finally:
+                self._connected.clear()
+                self._session = None
+                if self._lost is not None:
+                    self._lost.set()
+                    self._lost = None
+
+            if self._closed.is_set():
+                break
+            self.reconnects += 1
+            try:
+                await asyncio.wait_for(self._closed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _keep_alive(self, session: ClientSession) -> None:
+        """Ping the server until the session is closed or a reconnect is requested."""
+        while not self._closed.is_set() and not self._reconnect.is_set():
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.keepalive_interval)
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(session.send_ping(), self.connect_timeout)
+
+    async def session(self) -> ClientSession:
+        """Return the live session, waiting for the (re)connection if needed."""
+        return (await self._connection())[0]
+
+    async def _connection(self) -> Tuple[ClientSession, asyncio.Event]:
+        """The live session and the event set when it is torn down."""
+        self._ensure_started()
+        try:
+            await asyncio.wait_for(self._connected.wait(), self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionError(
+                f"Could not connect to {self.server_url}: {self._last_error or 'timed out'}"
+            )
+        return self._session, self._lost
+
+    async def _run_on(self, session: ClientSession, lost: asyncio.Event, operation) -> Any:
+        """Run an operation, failing it with ConnectionError if its session is torn down first."""
+        task = asyncio.ensure_future(operation(session))
+        lost_wait = asyncio.ensure_future(lost.wait())
+        try:
+            await asyncio.wait({task, lost_wait}, return_when=asyncio.FIRST_COMPLETED)
+        except BaseException:
+            task.cancel()
+            raise
+        finally:
+            lost_wait.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        raise ConnectionError(f"Lost connection to {self.server_url} during the call")
+
+    async def call(self, operation: Callable[[ClientSession], Awaitable[Any]]) -> Any:
+        """Run an operation on the session, retrying once if the stream dropped."""
+        session, lost = await self._connection()
+        try:
+            return await self._run_on(session, lost, operation)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            if self._session is session:
+                self._connected.clear()
+                self._reconnect.set()
+                self._wake.set()
+            session, lost = await self._connection()
+            return await self._run_on(session, lost, operation)
+
+    async def list_tools(self):
+        return await self.call(lambda session: session.list_tools())
+
+    async def call_tool(self, tool_name: str, tool_args: dict):
+        return await self.call(lambda session: session.call_tool(tool_name, arguments=tool_args))
+
+    async def close(self) -> None:
+        """Close the session and stop reconnecting."""
+        if self._task is None:
+            return
+        self._closed.set()
+        self._wake.set()
+        await self._task
+        self._task = None
@@ -0,0 +1,607 @@
+"""
+Storage for the papers and Wikipedia articles the servers fetch.
+
+Two interchangeable backends share one interface:
+
+- JsonStore keeps the original layout, one JSON file per topic:
+  papers/<topic>/papers_info.json and wiki_articles/<topic>/articles_info.json,
+  each with an append-only .jsonl log of the records saved since (see RecordLog)
+- SQLiteStore keeps everything in one SQLite database in WAL mode, with an
+  FTS5 index over titles, summaries and article previews
+
+Both backends answer local full-text searches ranked with BM25.
+
+open_store() picks the backend from the MCP_STORAGE environment variable
+("json", the default, or "sqlite"). The first time a SQLite database is opened
+it imports the existing JSON tree; the import can also be run by hand:
+
+    python -m shared.storage migrate --papers papers --wiki wiki_articles --db research.db
+
+Concurrent writers can be checked with the stress command, which saves to one
+topic from several processes and threads at once and verifies nothing was lost:
+
+    python -m shared.storage stress --processes 4 --threads 8 --writes 25
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from shared.local_search import InvertedIndex
+from shared.paper_index import PaperIndex
+from shared.record_log import RecordLog
+
+PAPERS_FILE = "papers_info.json"
+ARTICLES_FILE = "articles_info.json"
+DEFAULT_DB_FILE = "research.db"
+# Record fields that local search looks at
+SEARCH_FIELDS = ("title", "summary", "content_preview")
+
+
+def searchable_text(record: dict) -> str:
+    """The text of a record that local search indexes."""
+    return "\n".join(str(record.get(field) or "") for field in SEARCH_FIELDS)
+
+
+class JsonStore:
+    """
+    One pretty-printed JSON file per topic, as the servers have always written.
+
+    Saves append only the new and changed records to the topic's log, and
+    never drop records saved before.
+    """
+
+    def __init__(self, paper_dir: Optional[str] = None, wiki_dir: Optional[str] = None):
+        self.paper_dir = paper_dir
+        self.wiki_dir = wiki_dir
+        self.paper_index = PaperIndex(paper_dir) if paper_dir else None
+        # Local search indexes, built on first search and brought up to date by every search
+        self._search_lock = threading.Lock()
+        self._search_indexes: Dict[str, InvertedIndex] = {}
+        # kind -> topic -> (signature of the topic files when indexed, keys indexed)
+        self._search_topics: Dict[str, Dict[str, tuple]] = {}
+        # Cached topic listing, with the version it was taken at
+        self._topics_lock = threading.Lock()
+        self._topics_generation = 0
+        self._topics_cache: Optional[tuple] = None
+
+    def _papers_file(self, topic: str) -> RecordLog:
+        return RecordLog(os.path.join(self.paper_dir, topic, PAPERS_FILE), indent=2)
+
+    def _articles_file(self, topic: str) -> RecordLog:
+        return RecordLog(os.path.join(self.wiki_dir, topic, ARTICLES_FILE), indent=2, ensure_ascii=False)
+
+    # Papers
+
+    def save_papers(self, topic: str, papers: Dict[str, dict]) -> str:
+        """Add papers to a topic, keeping the ones saved before. Returns where they were saved."""
+        topic_file = self._papers_file(topic)
+        papers_info = topic_file.upsert(papers)
+
+        # Keep the paper ID index in sync with the topic file
+        self.paper_index.update(topic, papers_info, topic_file.saved_signature)
+        return topic_file.path
+
+    def get_paper(self, paper_id: str) -> Optional[dict]:
+        """Return a saved paper from any topic, or None."""
+        return self.paper_index.lookup(paper_id)
+
+    def get_papers(self, paper_ids: List[str]) -> Dict[str, dict]:
+        """Return the saved papers among paper_ids, by ID. IDs that aren't saved are left out."""
+        return self.paper_index.lookup_many(paper_ids)
+
+    # Articles
+
+    def save_articles(self, topic: str, articles: Dict[str, dict]) -> str:
+        """Add articles to a topic, keeping the ones saved before. Returns where they were saved."""
+        topic_file = self._articles_file(topic)
+        is_new_topic = not topic_file.exists()
+        topic_file.upsert(articles)
+        if is_new_topic:
+            with self._topics_lock:
+                self._topics_generation += 1
+        return topic_file.path
+
+    def get_articles(self, topic: str) -> Optional[Dict[str, dict]]:
+        """Return the articles of a topic, or None if the topic was never searched."""
+        topic_file = self._articles_file(topic)
+        if not topic_file.exists():
+            return None
+        return topic_file.load()
+
+    def articles_version(self, topic: str):
+        """A value that changes whenever a topic's articles change: the mtimes and sizes of its files."""
+        return self._articles_file(topic).signature()
+
+    def topics_version(self):
+        """
+        A value that changes whenever a topic is added or removed.
+
+        Topics created by this store bump a counter; topics created or removed
+        by another process change the mtime of the wiki directory.
+        """
+        try:
+            mtime_ns = os.stat(self.wiki_dir).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        with self._topics_lock:
+            return (mtime_ns, self._topics_generation)
+
+    def list_article_topics(self) -> List[str]:
+        """Return every topic that has saved articles. The listing is cached until topics_version() changes."""
+        version = self.topics_version()
+        cached = self._topics_cache
+        if cached is not None and cached[0] == version:
+            return list(cached[1])
+
+        topics = []
+        if os.path.exists(self.wiki_dir):
+            for topic_dir in os.listdir(self.wiki_dir):
+                if self._articles_file(topic_dir).exists():
+                    topics.append(topic_dir)
+        self._topics_cache = (version, topics)
+        return list(topics)
+
+    def iter_papers(self):
+        """Yield (topic, paper_id, record) for every saved paper."""
+        if not self.paper_dir or not os.path.isdir(self.paper_dir):
+            return
+        for topic in sorted(os.listdir(self.paper_dir)):
+            if not os.path.isdir(os.path.join(self.paper_dir, topic)):
+                continue
+            for paper_id, record in self._papers_file(topic).load().items():
+                yield topic, paper_id, record
+
+    def iter_articles(self):
+        """Yield (topic, article_key, record) for every saved article."""
+        if not self.wiki_dir or not os.path.isdir(self.wiki_dir):
+            return
+        for topic in sorted(self.list_article_topics()):
+            for key, record in (self.get_articles(topic) or {}).items():
+                yield topic, key, record
+
+    # Local search
+
+    def _topic_signatures(self, kind: str) -> Dict[str, tuple]:
+        """(topic file, signature) of every topic of a kind that has saved records."""
+        base_dir = self.paper_dir if kind == "papers" else self.wiki_dir
+        topic_file = self._papers_file if kind == "papers" else self._articles_file
+        try:
+            entries = [entry for entry in os.scandir(base_dir) if entry.is_dir()]
+        except (FileNotFoundError, TypeError):
+            entries = []
+        topics = {}
+        for entry in entries:
+            records_file = topic_file(entry.name)
+            signature = records_file.signature()
+            if signature is not None:
+                topics[entry.name] = (records_file, signature)
+        return topics
+
+    def _search_index(self, kind: str) -> InvertedIndex:
+        """
+        The search index of a kind, brought up to date with the topic files.
+
+        Like the paper index, it remembers the signature of every topic's files
+        and re-reads only the topics that changed, whoever wrote them: this
+        server, another server process or one of the Streamlit apps.
+        """
+        with self._search_lock:
+            index = self._search_indexes.setdefault(kind, InvertedIndex())
+            indexed = self._search_topics.setdefault(kind, {})
+            topics = self._topic_signatures(kind)
+
+            for topic in [topic for topic in indexed if topic not in topics]:
+                for key in indexed.pop(topic)[1]:
+                    index.remove((topic, key))
+
+            for topic, (records_file, signature) in topics.items():
+                known = indexed.get(topic)
+                if known is not None and known[0] == signature:
+                    continue
+                records = records_file.load()
+                for key in (known[1] if known else ()):
+                    if key not in records:
+                        index.remove((topic, key))
+                for key, record in records.items():
+                    index.add((topic, key), searchable_text(record), record)
+                indexed[topic] = (signature, set(records))
+            return index
+
+    def search(self, kind: str, query: str, limit: int = 10) -> List[dict]:
+        """
+        Rank saved papers or articles against a free-text query with BM25.
+
+        Args:
+            kind: "papers" or "articles"
+            query: Words to look for in titles, summaries and previews
+            limit: Maximum number of results
+
+        Returns:
+            Matches, best first, as dicts with topic, id, score and record
+        """
+        if kind not in ("papers", "articles"):
+            raise ValueError(f"Unknown kind: {kind}")
+        return [
+            {"topic": topic, "id": key, "score": score, "record": record}
+            for (topic, key), score, record in self._search_index(kind).search(query, limit)
+        ]
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    title TEXT,
+    summary TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (topic, paper_id)
+);
+CREATE INDEX IF NOT EXISTS papers_by_paper_id ON papers (paper_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title, summary, content='papers', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+    INSERT INTO papers_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    article_key TEXT NOT NULL,
+    title TEXT,
+    summary TEXT,
+    body TEXT,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (topic, article_key)
+);
+CREATE INDEX IF NOT EXISTS articles_by_title ON articles (title);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, summary, body, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, summary, body) VALUES (new.id, new.title, new.summary, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, summary, body) VALUES ('delete', old.id, old.title, old.summary, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, summary, body) VALUES ('delete', old.id, old.title, old.summary, old.body);
+    INSERT INTO articles_fts (rowid, title, summary, body) VALUES (new.id, new.title, new.summary, new.body);
+END;
+"""
+
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches any of its words."""
+    words = re.findall(r"\w+", text, flags=re.UNICODE)
+    return " OR ".join(f'"{word}"' for word in words)
+
+
+class SQLiteStore:
+    """
+    Papers and articles in one SQLite database.
+
+    The database runs in WAL mode, so readers never block the writer and
+    several server processes can share it. Each thread gets its own connection.
+    Writes touch only the rows they change.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    # Papers
+
+    def _upsert_papers(self, conn: sqlite3.Connection, topic: str, papers: Dict[str, dict]) -> None:
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO papers (topic, paper_id, title, summary, data, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (topic, paper_id) DO UPDATE SET "
+            "title = excluded.title, summary = excluded.summary, "
+            "data = excluded.data, updated_at = excluded.updated_at",
+            [
+                (topic, paper_id, record.get("title"), record.get("summary"), json.dumps(record), now)
+                for paper_id, record in papers.items()
+            ],
+        )
+
+    def save_papers(self, topic: str, papers: Dict[str, dict]) -> str:
+        """Add papers to a topic, keeping the ones saved before. Returns where they were saved."""
+        with self._connect() as conn:
+            self._upsert_papers(conn, topic, papers)
+        return f"{self.db_path} (papers, topic '{topic}')"
+
+    def get_paper(self, paper_id: str) -> Optional[dict]:
+        """Return a saved paper from any topic, or None."""
+        row = self._connect().execute(
+            "SELECT data FROM papers WHERE paper_id = ? ORDER BY updated_at DESC LIMIT 1",
+            (paper_id,),
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def get_papers(self, paper_ids: List[str]) -> Dict[str, dict]:
+        """Return the saved papers among paper_ids, by ID. IDs that aren't saved are left out."""
+        if not paper_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in paper_ids)
+        rows = self._connect().execute(
+            f"SELECT paper_id, data FROM papers WHERE paper_id IN ({placeholders}) ORDER BY updated_at",
+            list(paper_ids),
+        ).fetchall()
+        # Newest last, so a paper saved under several topics keeps its latest record
+        return {row["paper_id"]: json.loads(row["data"]) for row in rows}
+
+    # Articles
+
+    def _upsert_articles(self, conn: sqlite3.Connection, topic: str, articles: Dict[str, dict]) -> None:
+        now = time.time()
+        conn.executemany(
+            "INSERT INTO articles (topic, article_key, title, summary, body, data, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (topic, article_key) DO UPDATE SET "
+            "title = excluded.title, summary = excluded.summary, body = excluded.body, "
+            "data = excluded.data, updated_at = excluded.updated_at",
+            [
+                (topic, key, record.get("title"), record.get("summary"), record.get("content_preview"),
+                 json.dumps(record, ensure_ascii=False), now)
+                for key, record in articles.items()
+            ],
+        )
+
+    def save_articles(self, topic: str, articles: Dict[str, dict]) -> str:
+        """Add articles to a topic, keeping the ones saved before. Returns where they were saved."""
+        with self._connect() as conn:
+            self._upsert_articles(conn, topic, articles)
+        return f"{self.db_path} (articles, topic '{topic}')"
+
+    def get_articles(self, topic: str) -> Optional[Dict[str, dict]]:
+        """Return the articles of a topic, or None if the topic was never searched."""
+        rows = self._connect().execute(
+            "SELECT article_key, data FROM articles WHERE topic = ? ORDER BY id",
+            (topic,),
+        ).fetchall()
+        if not rows:
+            return None
+        return {row["article_key"]: json.loads(row["data"]) for row in rows}
+
+    def list_article_topics(self) -> List[str]:
+        """Return every topic that has saved articles."""
+        rows = self._connect().execute("SELECT DISTINCT topic FROM articles ORDER BY topic").fetchall()
+        return [row["topic"] for row in rows]
+
+    def articles_version(self, topic: str):
+        """A value that changes whenever a topic's articles change."""
+        row = self._connect().execute(
+            "SELECT COUNT(*), MAX(updated_at) FROM articles WHERE topic = ?", (topic,)
+        ).fetchone()
+        return tuple(row)
+
+    def topics_version(self):
+        """A value that changes whenever a topic is added. Articles are never deleted, so the newest row id will do."""
+        return self._connect().execute("SELECT MAX(id) FROM articles").fetchone()[0]
+
+    # Full-text search
+
+    def search(self, kind: str, query: str, limit: int = 10) -> List[dict]:
+        """
+        Rank saved papers or articles against a free-text query with FTS5's BM25.
+
+        Args:
+            kind: "papers" or "articles"
+            query: Words to look for in titles, summaries and previews
+            limit: Maximum number of results
+
+        Returns:
+            Matches, best first, as dicts with topic, id, score and record
+        """
+        if kind not in ("papers", "articles"):
+            raise ValueError(f"Unknown kind: {kind}")
+        match = fts_query(query)
+        if not match:
+            return []
+        id_column = "paper_id" if kind == "papers" else "article_key"
+        rows = self._connect().execute(
+            f"SELECT t.topic, t.{id_column} AS item_id, t.data, bm25({kind}_fts) AS score "
+            f"FROM {kind}_fts JOIN {kind} t ON t.id = {kind}_fts.rowid "
+            f"WHERE {kind}_fts MATCH ? ORDER BY score LIMIT ?",
+            (match, limit),
+        ).fetchall()
+        return [
+            {"topic": row["topic"], "id": row["item_id"], "score": -row["score"], "record": json.loads(row["data"])}
+            for row in rows
+        ]
+
+
+def migrate_json_tree(source: JsonStore, target: SQLiteStore, kinds=("papers", "articles")) -> Dict[str, int]:
+    """
+    Copy every paper and article of a JSON tree into a SQLite store.
+
+    Runs in one transaction per kind and can be repeated: rows are upserted.
+    Each kind whose directory the source has is marked as imported
+    (migrated_papers / migrated_articles). Returns how many papers and
+    articles were copied.
+    """
+    counts = {"papers": 0, "articles": 0}
+    conn = target._connect()
+
+    if "papers" in kinds and source.paper_dir:
+        with conn:
+            by_topic: Dict[str, Dict[str, dict]] = {}
+            for topic, paper_id, record in source.iter_papers():
+                by_topic.setdefault(topic, {})[paper_id] = record
+                counts["papers"] += 1
+            for topic, papers in by_topic.items():
+                target._upsert_papers(conn, topic, papers)
+        target.set_meta("migrated_papers", str(time.time()))
+
+    if "articles" in kinds and source.wiki_dir:
+        with conn:
+            by_topic = {}
+            for topic, key, record in source.iter_articles():
+                by_topic.setdefault(topic, {})[key] = record
+                counts["articles"] += 1
+            for topic, articles in by_topic.items():
+                target._upsert_articles(conn, topic, articles)
+        target.set_meta("migrated_articles", str(time.time()))
+
+    return counts
+
+
+def open_store(paper_dir: Optional[str] = None, wiki_dir: Optional[str] = None, db_path: Optional[str] = None):
+    """
+    Open the store selected by MCP_STORAGE ("json" or "sqlite").
+
+    For SQLite the database is MCP_SQLITE_PATH, or research.db next to the
+    papers/wiki directory. Each kind's JSON tree is imported once, the
+    first time a store for that kind opens the database, so the arXiv and
+    Wikipedia servers can share one database in either order.
+    """
+    backend = os.getenv("MCP_STORAGE", "json").lower()
+    if backend == "json":
+        return JsonStore(paper_dir, wiki_dir)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown MCP_STORAGE backend: {backend}")
+
+    base_dir = os.path.dirname(os.path.abspath(paper_dir or wiki_dir or DEFAULT_DB_FILE))
+    db_path = db_path or os.getenv("MCP_SQLITE_PATH") or os.path.join(base_dir, DEFAULT_DB_FILE)
+    store = SQLiteStore(db_path)
+    pending = [
+        kind for kind, directory in (("papers", paper_dir), ("articles", wiki_dir))
+        if directory and store.get_meta(f"migrated_{kind}") is None
+    ]
+    if pending:
+        counts = migrate_json_tree(JsonStore(paper_dir, wiki_dir), store, pending)
+        # stderr: stdout is the JSON-RPC channel of the stdio servers
+        print(f"Imported {counts['papers']} papers and {counts['articles']} articles into {db_path}", file=sys.stderr)
+    return store
+
+
+def _stress_worker(backend: str, data_dir: str, worker: int, threads: int, writes: int) -> None:
+    """Save `threads * writes` articles to the "stress" topic from one process."""
+    if backend == "sqlite":
+        store = SQLiteStore(os.path.join(data_dir, DEFAULT_DB_FILE))
+    else:
+        store = JsonStore(wiki_dir=data_dir)
+
+    def write(thread: int) -> None:
+        for i in range(writes):
+            key = f"worker-{worker}-thread-{thread}-{i}"
+            store.save_articles("stress", {key: {"title": key, "summary": f"Written by worker {worker}"}})
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(write, range(threads)))
+
+
+def stress(backend: str, processes: int, threads: int, writes: int) -> bool:
+    """
+    Hammer one topic with concurrent saves and check that every record survived.
+
+    Each process stands in for a server worker and each thread for a request
+    being handled. Returns True if no record was lost.
+    """
+    with tempfile.TemporaryDirectory() as data_dir:
+        if backend == "sqlite":
+            # Create the schema once, before the workers race to do it
+            SQLiteStore(os.path.join(data_dir, DEFAULT_DB_FILE))
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=_stress_worker, args=(backend, data_dir, worker, threads, writes))
+            for worker in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        if backend == "sqlite":
+            saved = SQLiteStore(os.path.join(data_dir, DEFAULT_DB_FILE)).get_articles("stress") or {}
+        else:
+            saved = JsonStore(wiki_dir=data_dir).get_articles("stress") or {}
+
+    expected = processes * threads * writes
+    failed = [process.exitcode for process in workers if process.exitcode != 0]
+    print(f"{backend}: {len(saved)}/{expected} records saved by {processes} processes x {threads} threads "
+          f"in {elapsed:.2f}s ({expected / elapsed:.0f} writes/s)")
+    if failed:
+        print(f"{len(failed)} worker processes failed")
+    return len(saved) == expected and not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Storage utilities for the course servers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="Copy the JSON tree into a SQLite database")
+    migrate.add_argument("--papers", default="papers", help="Papers directory (default: papers)")
+    migrate.add_argument("--wiki", default="wiki_articles", help="Wikipedia articles directory (default: wiki_articles)")
+    migrate.add_argument("--db", default=DEFAULT_DB_FILE, help=f"SQLite database (default: {DEFAULT_DB_FILE})")
+    stress_parser = commands.add_parser("stress", help="Check that concurrent writers to one topic lose nothing")
+    stress_parser.add_argument("--backend", choices=["json", "sqlite"], default="json", help="Store to test (default: json)")
+    stress_parser.add_argument("--processes", type=int, default=4, help="Writer processes (default: 4)")
+    stress_parser.add_argument("--threads", type=int, default=8, help="Writer threads per process (default: 8)")
+    stress_parser.add_argument("--writes", type=int, default=25, help="Saves per thread (default: 25)")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        counts = migrate_json_tree(JsonStore(args.papers, args.wiki), SQLiteStore(args.db))
+        print(f"Copied {counts['papers']} papers and {counts['articles']} articles into {args.db}")
+    elif args.command == "stress":
+        if not stress(args.backend, args.processes, args.threads, args.writes):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from typing import Awaitable, Callable, Union
+
+# Called with each piece of text as it arrives
+TextCallback = Callable[[str], None]
+# Called with each tool_use block as soon as its input is complete
+ToolUseCallback = Callable[[object], Union[None, Awaitable[None]]]
+
+
+def stream_message(client, on_text: TextCallback, on_tool_use: ToolUseCallback, **params):
+    """
+    Stream one model response, reporting text and tool_use blocks as they arrive.
+
+    on_tool_use is called when a tool_use block is complete, while the rest of
+    the response may still be streaming, so the caller can start the tool early.
+
+    Args:
+        client: An anthropic.Anthropic client
+        on_text: Called with every text delta
+        on_tool_use: Called with every finished tool_use block
+        **params: Arguments for client.messages.stream (model, messages, tools...)
+
+    Returns:
+        The complete message, as messages.create would have returned it
+    """
+    with client.messages.stream(**params) as stream:
+        for event in stream:
+            if event.type == "text":
+                on_text(event.text)
+            elif event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                on_tool_use(event.content_block)
+        return stream.get_final_message()
+
+
+async def astream_message(client, on_text: TextCallback, on_tool_use: ToolUseCallback, **params):
+    """
+    Async version of stream_message for an anthropic.AsyncAnthropic client.
+
+    on_tool_use may be a coroutine function; it is awaited before streaming
+    continues, so it should only start the tool (e.g. asyncio.create_task).
+    """
+    async with client.messages.stream(**params) as stream:
+        async for event in stream:
+            if event.type == "text":
+                on_text(event.text)
+            elif event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                started = on_tool_use(event.content_block)
+                if started is not None:
+                    await started
+        return await stream.get_final_message()
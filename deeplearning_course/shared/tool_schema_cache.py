@@ -0,0 +1,61 @@
+import hashlib
+import json
+import os
+import threading
+from typing import List, Optional
+
+
+class ToolSchemaCache:
+    """
+    Tool schemas of MCP servers saved on disk, so a client can offer the tools
+    before the servers have finished starting.
+
+    Entries are keyed by a hash of the server's command, args and env, so any
+    change to a server's entry in server_config.json starts from a fresh list.
+    """
+
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._entries = {}
+
+    @staticmethod
+    def key_for(server_config: dict) -> str:
+        """Hash of the parts of a server config that decide which tools it has."""
+        identity = {
+            "command": server_config.get("command"),
+            "args": server_config.get("args", []),
+            "env": server_config.get("env") or {},
+        }
+        encoded = json.dumps(identity, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _save(self) -> None:
+        tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_file)
+
+    def get(self, server_config: dict) -> Optional[List[dict]]:
+        """Return the cached tools of a server, or None if there are none."""
+        with self._lock:
+            return self._entries.get(self.key_for(server_config))
+
+    def put(self, server_config: dict, tools: List[dict]) -> None:
+        """Save the tools a server reported."""
+        with self._lock:
+            key = self.key_for(server_config)
+            if self._entries.get(key) == tools:
+                return
+            self._entries[key] = tools
+            self._save()
+
+    def invalidate(self, server_config: dict) -> None:
+        """Forget the tools of a server, e.g. after notifications/tools/list_changed."""
+        with self._lock:
+            if self._entries.pop(self.key_for(server_config), None) is not None:
+                self._save()
@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple
+
+from shared.file_lock import file_lock
+from shared.record_log import write_json_atomic
+
+ALIASES_FILE = "topic_aliases.json"
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Fold a topic to a comparable key: no accents, case-folded, words joined by "_".
+
+    "  República de Colombia " and "republica_de_colombia" give the same key.
+    """
+    text = unicodedata.normalize("NFKD", topic)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return "_".join(re.findall(r"\w+", text.casefold()))
+
+
+class TopicAliases:
+    """
+    Table from searched topics to the canonical topic their results are saved under.
+
+    The canonical topic is the normalized title of the page a search resolves
+    to first, so "usa", "united states" and "Estados Unidos" all end up under
+    "united_states" once each has been searched. Each entry also keeps the
+    page titles that search returned, so repeating an equivalent search can
+    be answered from the store without asking Wikipedia again.
+
+    The table is a JSON file shared by every server process. It is re-read when
+    its mtime changes and rewritten atomically under a lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self._lock = threading.Lock()
+        # normalized topic -> {"canonical": str, "titles": [page titles]}
+        self._aliases: Dict[str, dict] = {}
+        self._mtime_ns: Optional[int] = None
+
+    def _reload(self) -> None:
+        """Re-read the table if another process changed it. Caller holds the lock."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime_ns == self._mtime_ns:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._aliases = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self._mtime_ns = mtime_ns
+
+    def get(self, topic: str) -> Optional[dict]:
+        """Return {"canonical", "titles"} for a topic searched before, or None."""
+        with self._lock:
+            self._reload()
+            return self._aliases.get(normalize_topic(topic))
+
+    def canonical(self, topic: str) -> str:
+        """The topic results are saved under: the learned canonical topic, or the normalized one."""
+        entry = self.get(topic)
+        return entry["canonical"] if entry else normalize_topic(topic)
+
+    def learn(self, topic: str, canonical: str, titles: List[str]) -> None:
+        """Remember that a search for topic resolved to canonical and returned these pages."""
+        self.learn_many({topic: (canonical, titles)})
+
+    def learn_many(self, entries: Dict[str, Tuple[str, List[str]]], replace: bool = True) -> List[str]:
+        """
+        Remember several searches in one write: topic -> (canonical, titles).
+
+        With replace=False, topics already in the table keep their entry.
+        Returns the topics whose entry was written.
+        """
+        with file_lock(self.lock_path), self._lock:
+            self._reload()
+            learned = []
+            for topic, (canonical, titles) in entries.items():
+                key = normalize_topic(topic)
+                if replace or key not in self._aliases:
+                    self._aliases[key] = {"canonical": canonical, "titles": titles}
+                    learned.append(topic)
+            write_json_atomic(self.path, self._aliases, indent=2, ensure_ascii=False)
+            self._mtime_ns = os.stat(self.path).st_mtime_ns
+            return learned
+
+
+def seed_aliases(
+    aliases: TopicAliases,
+    store,
+    resolve: Callable[[List[str]], Dict[str, Optional[str]]],
+    merge: bool = True,
+) -> Dict[str, Optional[str]]:
+    """
+    Learn the topics that versions without aliases saved, one folder per spelling.
+
+    Those versions saved a search for "usa" under usa/, "eeuu" under eeuu/ and
+    so on. Each folder's topic is resolved as a page title, following
+    Wikipedia's redirects ("USA" and "EEUU" both lead to "United States"), and
+    the normalized title of that page is its canonical topic. Topics that
+    don't lead to an article (missing or disambiguation pages) are left out
+    rather than guessed from the folder's search results.
+
+    With merge, the folder's articles are also saved under the canonical
+    topic, so repeating one of those searches is answered from the store. The
+    old folders are left in place. Topics already in the table are kept.
+
+    Args:
+        aliases: The table to seed
+        store: Where the articles are saved (open_store)
+        resolve: Maps topics to the title of the article each resolves to, or
+            None (see resolve_with_mediawiki)
+        merge: Copy each folder's articles under its canonical topic
+
+    Returns:
+        Dict mapping each newly learned topic to its canonical topic, and each
+        topic that couldn't be resolved to None
+    """
+    folders = {}
+    for topic in store.list_article_topics():
+        articles = store.get_articles(topic) or {}
+        if articles:
+            folders[topic] = articles
+    resolved = resolve([topic.replace("_", " ") for topic in folders])
+
+    entries: Dict[str, Tuple[str, List[str]]] = {}
+    unresolved: Dict[str, Optional[str]] = {}
+    for topic, articles in folders.items():
+        title = resolved.get(topic.replace("_", " "))
+        if not title:
+            unresolved[topic] = None
+            continue
+        canonical = normalize_topic(title)
+        if merge and canonical != topic:
+            store.save_articles(canonical, articles)
+        entries[topic] = (canonical, list(articles))
+    learned = aliases.learn_many(entries, replace=False)
+    return {**{topic: entries[topic][0] for topic in learned}, **unresolved}
+
+
+def resolve_with_mediawiki(topics: List[str]) -> Dict[str, Optional[str]]:
+    """Resolve topics as page titles through the MediaWiki API, in multi-title requests."""
+    from shared.mediawiki import MediaWikiClient
+
+    async def resolve() -> Dict[str, Optional[str]]:
+        wiki = MediaWikiClient()
+        try:
+            pages = await wiki.summaries(topics)
+        finally:
+            await wiki.aclose()
+        return {topic: None if isinstance(page, Exception) else page.title for topic, page in pages.items()}
+
+    return asyncio.run(resolve()) if topics else {}
+
+
+def main():
+    from shared.storage import open_store
+
+    parser = argparse.ArgumentParser(description="Topic alias utilities for the Wikipedia servers")
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed = commands.add_parser("seed", help="Learn aliases from the topic folders saved before aliases existed")
+    seed.add_argument("--wiki", default="wiki_articles", help="Wikipedia articles directory (default: wiki_articles)")
+    seed.add_argument("--no-merge", action="store_true", help="Only learn the aliases, don't copy articles to the canonical topics")
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        aliases = TopicAliases(os.path.join(args.wiki, ALIASES_FILE))
+        seeded = seed_aliases(aliases, open_store(wiki_dir=args.wiki), resolve_with_mediawiki, merge=not args.no_merge)
+        for topic, canonical in sorted(seeded.items()):
+            print(f"{topic} -> {canonical or '(not an article, skipped)'}")
+        learned = sum(1 for canonical in seeded.values() if canonical)
+        print(f"Learned {learned} topics into {aliases.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+# Seconds an entry stays valid, in memory and on disk
+DEFAULT_TTL = 6 * 60 * 60
+# Bytes of page data kept in memory before the least recently used entries are dropped
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Bytes of page files kept on disk before the least recently used ones are deleted
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+# Seconds between sweeps of the disk level for expired files
+PRUNE_INTERVAL = 10 * 60
+
+
+class PageData(NamedTuple):
+    """The parts of a Wikipedia page the tools use, detached from the wikipedia library."""
+    title: str
+    url: str
+    summary: str
+    content: str
+
+
+def fetch_page_data(title: str) -> PageData:
+    """Fetch a page from Wikipedia, loading its summary and content right away."""
+    import wikipedia
+    page = wikipedia.page(title)
+    return PageData(title=page.title, url=page.url, summary=page.summary, content=page.content)
+
+
+class ContentCache:
+    """
+    Two-level cache of Wikipedia pages: hot entries in memory, cold ones on disk.
+
+    The memory level is an LRU bounded by the total size of the cached pages.
+    Every entry is also written to cache_dir, so pages evicted from memory, or
+    fetched by an earlier run of the server, are read back without the network.
+    Entries older than ttl seconds are treated as missing.
+
+    The disk level is bounded too: expired files are deleted when they are
+    read and by a sweep every PRUNE_INTERVAL seconds, and once the files take
+    more than max_disk_bytes the least recently used ones are deleted. A disk
+    hit touches its file, so the file's mtime is its last use.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ttl: float = DEFAULT_TTL,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        # key -> (stored_at, size in bytes, page)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        # Bytes on disk as of the last sweep plus what this process wrote since; None before the first sweep
+        self._disk_bytes: Optional[int] = None
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    @staticmethod
+    def _key(title: str) -> str:
+        return title.strip()
+
+    @staticmethod
+    def _size(page: PageData) -> int:
+        return len(page.content.encode("utf-8")) + len(page.summary.encode("utf-8"))
+
+    def _disk_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _remember(self, key: str, stored_at: float, size: int, page: PageData) -> None:
+        """Add an entry to the memory level and evict until it fits. Caller holds the lock."""
+        old = self._entries.pop(key, None)
+        if old:
+            self._bytes -= old[1]
+        self._entries[key] = (stored_at, size, page)
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("key") != key:
+            return None
+        if time.time() - data["stored_at"] > self.ttl:
+            self._remove_file(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data["stored_at"], PageData(**data["page"])
+
+    def _write_disk(self, key: str, payload: str) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data = payload.encode("utf-8")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data)
+            due = (
+                self._disk_bytes is None
+                or self._disk_bytes > self.max_disk_bytes
+                or now - self._last_prune >= PRUNE_INTERVAL
+            )
+        if due:
+            self.prune_disk()
+
+    @staticmethod
+    def _remove_file(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def prune_disk(self) -> None:
+        """
+        Delete expired page files, then the least recently used ones until the rest fit in max_disk_bytes.
+
+        Temporary files left behind by an interrupted write are deleted once
+        they are older than ttl. Only one thread sweeps at a time; the others
+        skip it.
+        """
+        if not self._prune_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.time()
+            files = []
+            try:
+                entries = list(os.scandir(self.cache_dir))
+            except FileNotFoundError:
+                entries = []
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if not entry.is_file():
+                    continue
+                if now - stat.st_mtime > self.ttl and (entry.name.endswith(".tmp") or self._is_expired(entry.path, now)):
+                    self._remove_file(entry.path)
+                    continue
+                if entry.name.endswith(".json"):
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_disk_bytes:
+                    break
+                if self._remove_file(path):
+                    self.disk_evictions += 1
+                total -= size
+
+            with self._lock:
+                self._disk_bytes = total
+                self._last_prune = now
+        finally:
+            self._prune_lock.release()
+
+    def _is_expired(self, path: str, now: float) -> bool:
+        """Whether a page file not touched for ttl seconds also holds an expired entry."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return now - json.load(f)["stored_at"] > self.ttl
+        except (OSError, ValueError, KeyError, TypeError):
+            # Unreadable files are of no use to the cache
+            return True
+
+    def _get_memory(self, key: str) -> Optional[PageData]:
+        """The page from the memory level, counting a hit, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self._bytes -= entry[1]
+            del self._entries[key]
+            return None
+
+    def _get_disk(self, key: str) -> Optional[PageData]:
+        """The page from the disk level, moving it into memory, or None (counting a miss)."""
+        found = self._read_disk(key)
+        with self._lock:
+            if found is None:
+                self.misses += 1
+                return None
+            stored_at, page = found
+            self.disk_hits += 1
+            self._remember(key, stored_at, self._size(page), page)
+            return page
+
+    def get(self, title: str) -> Optional[PageData]:
+        """Return the cached page for a title, or None if it is missing or expired."""
+        key = self._key(title)
+        page = self._get_memory(key)
+        if page is not None:
+            return page
+        return self._get_disk(key)
+
+    async def aget(self, title: str) -> Optional[PageData]:
+        """Async version of get: memory hits are answered in place, disk reads run in a worker thread."""
+        key = self._key(title)
+        page = self._get_memory(key)
+        if page is not None:
+            return page
+        return await asyncio.to_thread(self._get_disk, key)
+
+    def _store(self, title: str, page: PageData) -> tuple:
+        """Put a page in the memory level. Returns the key and the payload to write to disk."""
+        key = self._key(title)
+        stored_at = time.time()
+        payload = json.dumps({"key": key, "stored_at": stored_at, "page": page._asdict()}, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, stored_at, self._size(page), page)
+        return key, payload
+
+    def _persist(self, key: str, payload: str) -> None:
+        try:
+            self._write_disk(key, payload)
+        except OSError as e:
+            print(f"Error writing cache entry for '{key}': {str(e)}", file=sys.stderr)
+
+    def put(self, title: str, page: PageData) -> None:
+        """Store a page under a title in memory and on disk."""
+        self._persist(*self._store(title, page))
+
+    def fetch(self, title: str, fetch: Callable[[str], PageData] = None) -> PageData:
+        """
+        Return a page from the cache, fetching and caching it on a miss.
+
+        The page is cached under both the requested title and the title
+        Wikipedia resolved it to. Errors from fetch are not cached.
+        """
+        page = self.get(title)
+        if page is not None:
+            return page
+        page = (fetch or fetch_page_data)(title)
+        self._put_resolved(title, page)
+        return page
+
+    async def afetch(self, title: str, fetch: Callable[[str], Awaitable[PageData]]) -> PageData:
+        """
+        Async version of fetch, for an async fetch such as MediaWikiClient.page.
+
+        The disk reads and writes run in worker threads, so they don't hold up
+        the event loop.
+        """
+        page = await self.aget(title)
+        if page is not None:
+            return page
+        page = await fetch(title)
+        writes = [self._store(title, page)]
+        if self._key(page.title) != self._key(title):
+            writes.append(self._store(page.title, page))
+        await asyncio.to_thread(lambda: [self._persist(*write) for write in writes])
+        return page
+
+    def _put_resolved(self, title: str, page: PageData) -> None:
+        self.put(title, page)
+        if self._key(page.title) != self._key(title):
+            self.put(page.title, page)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current memory usage."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, List
+
+# Pages fetched at the same time by one search
+DEFAULT_MAX_WORKERS = 5
+# Seconds a single page may take once its fetch has started
+DEFAULT_PAGE_TIMEOUT = 10.0
+
+
+class PageTimeout(Exception):
+    """Raised in place of a page that did not arrive before its deadline."""
+
+
+def _default_fetch(title: str):
+    import wikipedia
+    page = wikipedia.page(title)
+    # content and summary are separate lazy requests; load them in the worker
+    page.content
+    page.summary
+    return page
+
+
+def fetch_pages(
+    titles: List[str],
+    fetch: Callable[[str], object] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    page_timeout: float = DEFAULT_PAGE_TIMEOUT,
+) -> Dict[str, object]:
+    """
+    Fetch several Wikipedia pages concurrently with a bounded worker pool.
+
+    Each page gets page_timeout seconds from the moment its fetch starts. Pages
+    that miss the deadline, or never get a free worker because every worker is
+    stuck on a late page, come back as PageTimeout so the caller can still use
+    the pages that did arrive.
+
+    Args:
+        titles: Page titles to fetch
+        fetch: Function that fetches one page (default: wikipedia.page). Pass a
+            stand-in to run against a local backend.
+        max_workers: Maximum number of pages fetched at the same time
+        page_timeout: Seconds allowed for each page
+
+    Returns:
+        Dict mapping each title, in the given order, to its page or to the
+        exception raised while fetching it
+    """
+    fetch = fetch or _default_fetch
+    results: Dict[str, object] = {}
+    started: Dict[str, float] = {}
+
+    def run(title: str):
+        started[title] = time.monotonic()
+        return fetch(title)
+
+    workers = max(1, min(max_workers, len(titles)))
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {executor.submit(run, title): title for title in titles}
+    pending = set(futures)
+    late = set()
+
+    try:
+        while pending:
+            now = time.monotonic()
+            for future in list(pending):
+                title = futures[future]
+                if title in started and now - started[title] >= page_timeout:
+                    results[title] = PageTimeout(f"No response for '{title}' after {page_timeout}s")
+                    pending.discard(future)
+                    late.add(future)
+
+            # Every worker is busy with a page that already missed its deadline,
+            # so the queued pages cannot start in time either
+            late = {future for future in late if not future.done()}
+            if pending and len(late) >= workers:
+                for future in pending:
+                    title = futures[future]
+                    results[title] = PageTimeout(f"No free worker for '{title}'")
+                    future.cancel()
+                break
+            if not pending:
+                break
+
+            deadlines = [
+                started[futures[future]] + page_timeout
+                for future in pending if futures[future] in started
+            ]
+            # With nothing running yet, poll until a queued page gets a worker
+            wait_for = max(0.0, min(deadlines) - now) if deadlines else 0.05
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                title = futures[future]
+                pending.discard(future)
+                try:
+                    results[title] = future.result()
+                except Exception as e:
+                    results[title] = e
+    finally:
+        # Don't wait for late pages; their threads finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {title: results[title] for title in titles if title in results}
+
+
+async def afetch_summaries(
+    titles: List[str],
+    fetch_summaries: Callable[[List[str]], Awaitable[Dict[str, object]]],
+    cache=None,
+    page_timeout: float = DEFAULT_PAGE_TIMEOUT,
+) -> Dict[str, object]:
+    """
+    Fetch the lead sections of several pages together, in multi-title requests.
+
+    Pages already in cache (a ContentCache) are answered from it; the rest go
+    to fetch_summaries (e.g. MediaWikiClient.summaries) in a single call. If
+    that call takes longer than page_timeout, every page it was fetching comes
+    back as PageTimeout.
+
+    Returns:
+        Dict mapping each title, in the given order, to a page with title, url
+        and summary, or to the exception raised while fetching it
+    """
+    pages: Dict[str, object] = {}
+    if cache is not None:
+        for title in titles:
+            page = await cache.aget(title)
+            if page is not None:
+                pages[title] = page
+
+    missing = [title for title in titles if title not in pages]
+    if missing:
+        try:
+            pages.update(await asyncio.wait_for(fetch_summaries(missing), page_timeout))
+        except asyncio.TimeoutError:
+            pages.update({title: PageTimeout(f"No response for '{title}' after {page_timeout}s") for title in missing})
+        except Exception as e:
+            pages.update({title: e for title in missing})
+    return {title: pages[title] for title in titles}